@@ -0,0 +1,45 @@
+"""Shared building blocks for the ESG portfolio backtest and dashboard refresh.
+
+The main classes can be imported from the package itself::
+
+    from esg import DashboardRenderer, MetricsEngine, Portfolio, PriceStore
+
+    store = PriceStore()
+    prices = store.panel(tickers, "2019-01-01")
+    valuation = Portfolio(weights).valuation(prices)
+
+Importing them has no side effects: nothing is downloaded, read or written
+until a method is called. They are loaded on first access, so ``import esg``
+(and ``python -m esg status``) does not pull in pandas or matplotlib.
+"""
+import importlib
+
+_EXPORTS = {
+    "DashboardRenderer": "esg.dashboard",
+    "MetricsAccumulator": "esg.metrics",
+    "MetricsEngine": "esg.metrics",
+    "Portfolio": "esg.backtest",
+    "PricePanel": "esg.panel",
+    "PriceStore": "esg.price_store",
+    "RangeQueryIndex": "esg.range_index",
+    "dashboard_html": "esg.dashboard",
+    "get_provider": "esg.providers",
+    "load_panel": "esg.price_store",
+    "load_prices": "esg.price_store",
+    "performance_tables": "esg.backtest",
+    "rolling_stats": "esg.rolling",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'esg' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,5 @@
+import sys
+
+from esg.cli import main
+
+sys.exit(main())
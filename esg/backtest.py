@@ -0,0 +1,138 @@
+"""Buy-and-hold (or rebalanced) backtest of one weighting, without globals.
+
+``Portfolio`` holds the target weights, starting capital and rebalancing
+policy; ``Portfolio.valuation`` values it on a ``PricePanel`` and returns the
+same dict the backtest pipeline passes to its metrics, chart and dashboard
+stages. ``performance_tables`` builds the metrics and multi-timeframe
+comparison tables shown on the dashboard, with timeframe windows taken from
+the trading calendar (``esg.trading_calendar.period_positions``) and read
+off a ``RangeQueryIndex`` built once per series. Nothing
+here reads configuration, touches the network or writes files, so a
+long-lived process can load prices once and call these repeatedly.
+"""
+import numpy as np
+import pandas as pd
+
+from esg.range_index import RangeQueryIndex
+from esg.rebalance import backtest_rebalanced
+from esg.trading_calendar import period_positions
+
+PERIODS_PER_YEAR = 252
+TIMEFRAMES = ("1M", "3M", "6M", "YTD", "1Y")
+
+
+class Portfolio:
+    """Target weights, starting capital and rebalancing policy for one backtest"""
+
+    def __init__(self, weights, initial=100000.0, rebalance=None, cost_bps=0.0, slippage_bps=0.0):
+        total = sum(weights.values())
+        self.weights = {k: v / total for k, v in weights.items()}
+        self.initial = initial
+        self.rebalance = rebalance
+        self.cost_bps = cost_bps
+        self.slippage_bps = slippage_bps
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["weights"], config["initial"], config["rebalance"],
+                   cost_bps=config["cost_bps"], slippage_bps=config["slippage_bps"])
+
+    def valuation(self, prices):
+        """Holdings, share quantities, first/last/previous prices and daily value on a PricePanel
+
+        Weights of tickers missing from prices are left out (not re-spread),
+        as in the original backtest. With a rebalancing policy the quantities
+        are the shares held after the last rebalance.
+        """
+        held = {k: v for k, v in self.weights.items() if k in prices.ticker_index}
+        first_prices = prices.row(0)
+        quantities = {t: (held[t] * self.initial) / first_prices[t] for t in held}
+        result = {"weights": held, "quantities": quantities, "first_prices": first_prices,
+                  "last_prices": prices.row(-1), "prev_prices": prices.row(-2)}
+
+        if self.rebalance:
+            rebalanced = backtest_rebalanced(
+                prices.to_frame(list(held.keys())), held, self.rebalance, self.initial,
+                cost_bps=self.cost_bps, slippage_bps=self.slippage_bps
+            )
+            result["values"] = rebalanced.values
+            result["quantities"] = rebalanced.quantities.iloc[-1].to_dict()
+            result["rebalancing"] = {"count": len(rebalanced.rebalances) - 1,
+                                     "annual_turnover": rebalanced.annual_turnover,
+                                     "total_cost": rebalanced.total_cost}
+        else:
+            result["values"] = pd.Series(prices.value(quantities), index=prices.index)
+        return result
+
+
+def calc_return(series, days):
+    if len(series) < days:
+        return np.nan
+    return ((series.iloc[-1] / series.iloc[-days]) - 1) * 100
+
+
+def timeframe_returns(series, index=None, inception=None):
+    """Percent returns over TIMEFRAMES, from calendar-exact base closes, then since inception
+
+    inception is the date Since Inception is measured from (the last bar on
+    or before it; NaN if the series starts later). It defaults to the
+    series' second bar, which is where the portfolio's figure has always
+    started, so benchmarks should be passed the portfolio's date to cover
+    the same period. index is the series' RangeQueryIndex if the caller
+    already holds one.
+    """
+    index = RangeQueryIndex(series) if index is None else index
+    last = len(index) - 1
+    bases = period_positions(index.dates, periods=TIMEFRAMES)
+    returns = [np.nan if base is None else index.total_return_rows(base, last) * 100 for base in bases.values()]
+    start = min(1, last) if inception is None else index.position(inception)
+    return returns + [index.total_return_rows(start, last) * 100 if 0 <= start <= last else np.nan]
+
+
+def performance_tables(values, benchmarks, snapshot, benchmark_names=None):
+    """Daily moves, the metrics table and the multi-timeframe comparison table
+
+    values is the portfolio value series, benchmarks a date x symbol price
+    frame and snapshot the portfolio's MetricsAccumulator snapshot.
+    """
+    benchmark_names = list(benchmarks.columns) if benchmark_names is None else benchmark_names
+
+    # Performance snapshot
+    last_val = values.iloc[-1]
+    prev_val = values.iloc[-2]
+    daily_change_pct = ((last_val - prev_val) / prev_val) * 100
+    bench_daily = {}
+    for b in benchmarks.columns:
+        bench_daily[b] = ((benchmarks[b].iloc[-1] - benchmarks[b].iloc[-2]) / benchmarks[b].iloc[-2]) * 100
+
+    cagr = snapshot["cagr"]
+    volatility = snapshot["volatility"]
+    sharpe = snapshot["sharpe"]
+    max_drawdown = snapshot["max_drawdown"]
+
+    metrics_table = pd.DataFrame({
+        "Portfolio": [f"{cagr*100:.2f}%", f"{volatility*100:.2f}%", f"{sharpe:.2f}", f"{max_drawdown*100:.2f}%"],
+        "QQQ": [
+            f"{((benchmarks['QQQ'].iloc[-1]/benchmarks['QQQ'].iloc[0])**(PERIODS_PER_YEAR/len(benchmarks))-1)*100:.2f}%",
+            "", "", ""
+        ],
+        "SPY": [
+            f"{((benchmarks['SPY'].iloc[-1]/benchmarks['SPY'].iloc[0])**(PERIODS_PER_YEAR/len(benchmarks))-1)*100:.2f}%",
+            "", "", ""
+        ]
+    }, index=["CAGR", "Volatility", "Sharpe Ratio", "Max Drawdown"])
+
+    # Each window ends at the series' last bar and starts at the last bar on or
+    # before the same date one period earlier (YTD: the previous year's close)
+    # Since Inception covers the portfolio's period for every column, not each
+    # benchmark's own (longer) history
+    inception = values.index[1] if len(values) > 1 else None
+    columns = {"Portfolio": timeframe_returns(values, inception=inception)}
+    for b in benchmark_names:
+        columns[b] = timeframe_returns(benchmarks[b], inception=inception)
+    comparison = pd.DataFrame(columns, index=[*TIMEFRAMES, "Since Inception"])
+
+    # FIX: use map() instead of applymap (removes deprecation warning)
+    comparison = comparison.map(lambda x: f"{x:.2f}%" if pd.notnull(x) else "-")
+    return {"last_val": last_val, "daily_change_pct": daily_change_pct, "bench_daily": bench_daily,
+            "metrics": metrics_table, "comparison": comparison}
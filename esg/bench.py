@@ -0,0 +1,217 @@
+"""Benchmark suite over synthetic panels, with stored baselines.
+
+Times the code the backtest ships on ``esg.synthetic`` panels of 16, 500
+and 5,000 tickers over 5, 20 and 50 years:
+
+- valuation: ``Portfolio.valuation`` on a ``PricePanel`` of every holding
+- metrics: incremental CAGR/volatility/Sharpe/drawdown of the portfolio path
+- rolling: ``rolling_stats`` of the portfolio and up to 32 holdings against
+  three benchmarks in all four windows (its dense output grows with series x
+  windows x statistics, so the universe is capped)
+- drawdown: ``RangeQueryIndex`` max drawdown of every holding
+- timeframes: ``performance_tables`` with every holding as a comparison column
+- html: ``dashboard_html`` with one table row per holding
+
+``python -m esg.bench run`` prints timings (best of --repeat runs).
+``compare`` runs the suite and compares the timings with
+``benchmarks/baselines.json``. It exits 1 when a case is slower than
+baseline by more than --tolerance, and 2 when the baseline has no timing for
+any case it ran. ``run --save`` records a new baseline;
+record it on the machine type that compares (the Benchmarks workflow does
+both on GitHub's runners).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from esg.backtest import Portfolio, performance_tables
+from esg.dashboard import dashboard_html
+from esg.metrics import MetricsAccumulator
+from esg.panel import PricePanel
+from esg.range_index import RangeQueryIndex
+from esg.rolling import WINDOWS, rolling_stats
+from esg.synthetic import synthetic_prices
+
+TICKERS = (16, 500, 5000)
+YEARS = (5, 20, 50)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "benchmarks", "baselines.json")
+DEFAULT_TOLERANCE = 0.5  # flag cases more than 50% slower than baseline
+NOISE_FLOOR = 0.005  # seconds; faster cases are too noisy to compare
+INITIAL = 100000.0
+WINDOW = 126
+BENCHMARKS = ("QQQ", "SPY", "ESGU")
+ROLLING_HOLDINGS = 32
+
+
+def _context(prices):
+    """Inputs shared by the cases, built once per panel size"""
+    clean = prices.ffill()
+    held = list(clean.columns[clean.iloc[0].notna()])
+    clean = clean[held]
+    panel = PricePanel.from_frame(clean)
+    weights = {t: 1.0 / len(held) for t in held}
+    valuation = Portfolio(weights, INITIAL).valuation(panel)
+    values = valuation["values"]
+    # The first three holdings stand in for QQQ, SPY and ESGU
+    benchmarks = clean[held[:3]].set_axis(list(BENCHMARKS), axis=1)
+    snapshot = MetricsAccumulator(WINDOW).extend(values).snapshot()
+    return {"prices": clean, "panel": panel, "held": held, "weights": weights, "valuation": valuation,
+            "values": values, "benchmarks": benchmarks, "snapshot": snapshot,
+            "tables": performance_tables(values, benchmarks, snapshot)}
+
+
+def bench_valuation(ctx):
+    return Portfolio(ctx["weights"], INITIAL).valuation(ctx["panel"])
+
+
+def bench_metrics(ctx):
+    return MetricsAccumulator(WINDOW).extend(ctx["values"]).snapshot()
+
+
+def bench_rolling(ctx):
+    holdings = ctx["prices"][ctx["held"][:ROLLING_HOLDINGS]]
+    levels = pd.concat([ctx["values"].rename("Portfolio"), holdings], axis=1)
+    return rolling_stats(levels, ctx["benchmarks"], WINDOWS)
+
+
+def bench_drawdown(ctx):
+    prices = ctx["prices"]
+    return {t: RangeQueryIndex(prices[t]).max_drawdown() for t in ctx["held"]}
+
+
+def bench_timeframes(ctx):
+    benchmarks = pd.concat([ctx["benchmarks"], ctx["prices"]], axis=1)
+    return performance_tables(ctx["values"], benchmarks, ctx["snapshot"], [*BENCHMARKS, *ctx["held"]])
+
+
+def bench_html(ctx):
+    held = ctx["held"]
+    news = {"names": {t: f"{t} Inc." for t in held},
+            "headlines": {t: f'<a href="https://example.com/{t}" target="_blank">{t} headline</a>' for t in held}}
+    return dashboard_html(ctx["valuation"], ctx["tables"], news)
+
+
+CASES = {
+    "valuation": bench_valuation,
+    "metrics": bench_metrics,
+    "rolling": bench_rolling,
+    "drawdown": bench_drawdown,
+    "timeframes": bench_timeframes,
+    "html": bench_html,
+}
+
+
+def _time(func, ctx, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(ctx)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_suite(tickers=TICKERS, years=YEARS, cases=None, repeat=3, seed=0):
+    """{"case@<tickers>x<years>y": best seconds} for every case and panel size"""
+    results = {}
+    for n in tickers:
+        for y in years:
+            ctx = _context(synthetic_prices(n, y, seed=seed))
+            for name in cases or CASES:
+                key = f"{name}@{n}x{y}y"
+                # The biggest panels take long enough that one run is representative
+                results[key] = _time(CASES[name], ctx, repeat if n * y <= 25000 else 1)
+                print(f"{key:<28} {results[key] * 1000:10.1f} ms", flush=True)
+            del ctx
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Cases slower than baseline * (1 + tolerance), as {key: (baseline, current)}"""
+    return {
+        key: (baseline[key], seconds)
+        for key, seconds in results.items()
+        if key in baseline and max(seconds, baseline[key]) >= NOISE_FLOOR
+        and seconds > baseline[key] * (1 + tolerance)
+    }
+
+
+def _machine():
+    return (f"{platform.machine()} {platform.processor() or platform.system()}, "
+            f"{os.cpu_count()} CPUs, Python {platform.python_version()}")
+
+
+def _load_baseline(path):
+    """(machine the baseline was recorded on, {case: seconds})"""
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    return saved.get("machine"), saved["results"]
+
+
+def _save_baseline(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    saved = {"machine": _machine(), "results": {k: round(v, 6) for k, v in sorted(results.items())}}
+    if os.path.exists(path):
+        machine, previous = _load_baseline(path)
+        # Timings from another machine are not comparable, so they are not carried over
+        if machine == saved["machine"]:
+            saved["results"] = {**previous, **saved["results"]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(saved, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def _sizes(text, default):
+    return tuple(int(v) for v in text.split(",")) if text else default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="esg.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["run", "compare"])
+    parser.add_argument("--tickers", help=f"comma-separated ticker counts (default {TICKERS})")
+    parser.add_argument("--years", help=f"comma-separated history lengths (default {YEARS})")
+    parser.add_argument("--cases", help=f"comma-separated subset of {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="store the timings as the new baseline")
+    args = parser.parse_args(argv)
+
+    cases = args.cases.split(",") if args.cases else None
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    results = run_suite(_sizes(args.tickers, TICKERS), _sizes(args.years, YEARS), cases, args.repeat)
+    if args.save:
+        _save_baseline(args.baseline, results)
+        print(f"✓ Saved {len(results)} timings to {args.baseline}")
+    if args.command == "run":
+        return 0
+
+    machine, baseline = _load_baseline(args.baseline)
+    if not any(key in baseline for key in results):
+        print(f"⚠ {args.baseline} has no timings for these cases, so nothing was compared"
+              " (record a baseline with `run --save`)")
+        return 2
+    if machine != _machine():
+        print(f"⚠ Baseline was recorded on {machine}, this is {_machine()}; timings may not be comparable")
+    slower = compare(results, baseline, args.tolerance)
+    for key, (before, after) in sorted(slower.items()):
+        print(f"⚠ Regression {key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({after / before:.2f}x)")
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"⚠ No baseline for {len(missing)} cases: {', '.join(missing[:5])}{' ...' if len(missing) > 5 else ''}"
+              " (record one with `run --save`)")
+    if not slower:
+        print(f"✓ No case slower than baseline by more than {args.tolerance:.0%}")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Headless chart rendering, one figure per worker process.
+
+Every chart is a plain function of (path, data) that draws on its own
+``matplotlib.figure.Figure`` with the Agg canvas, so nothing touches pyplot's
+global state or needs a display. ``render_charts`` fans a list of such jobs
+out over a process pool; figure count then costs wall time only once it
+exceeds the number of cores.
+
+Workers come from a fork server (spawned processes on platforms without
+one) rather than a plain fork, because charts render while other pipeline
+stages are still running threads. Both entry scripts keep their work under
+``if __name__ == "__main__"`` so a worker importing them does nothing.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from esg.manifest import fingerprint
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+DEFAULT_DPI = 100
+# Bump when chart styling changes so cached PNGs are redrawn
+CHART_VERSION = "1"
+
+
+def _figure(figsize, ncols=1):
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, ncols)
+    return fig, axes
+
+
+def _save(fig, path, dpi=DEFAULT_DPI):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def dashboard_chart(path, values, rolling_sharpe, drawdown):
+    """Three panels side by side: portfolio value, rolling Sharpe and drawdown"""
+    fig, axs = _figure((20, 6), ncols=3)
+    axs[0].plot(values)
+    axs[0].set_title("Portfolio Value ($)")
+    axs[1].plot(rolling_sharpe)
+    axs[1].set_title("Rolling Sharpe Ratio")
+    axs[2].plot(drawdown, color="red")
+    axs[2].set_title("Drawdown")
+    for ax in axs:
+        ax.grid(True)
+    return _save(fig, path)
+
+
+def line_chart(path, series, title, ylabel=None, figsize=(10, 6), styles=None):
+    """One line per {label: Series} entry, with a legend when there is more than one"""
+    fig, ax = _figure(figsize)
+    styles = styles or {}
+    for label, s in series.items():
+        ax.plot(s.index, s.to_numpy(), label=label, **styles.get(label, {}))
+    ax.set_title(title)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if len(series) > 1:
+        ax.legend()
+    ax.grid(True)
+    return _save(fig, path)
+
+
+def _render(job):
+    func, kwargs = job
+    return func(**kwargs)
+
+
+def render_charts(jobs, workers=None, manifest=None):
+    """Render [(chart_function, kwargs)] jobs in parallel and return every output path
+
+    With a manifest, jobs whose inputs hash the same as on the last run and
+    whose PNG still exists are not redrawn.
+    """
+    jobs = list(jobs)
+    paths = [kwargs["path"] for _, kwargs in jobs]
+    digests = {}
+    if manifest is not None:
+        for func, kwargs in jobs:
+            digests[kwargs["path"]] = fingerprint(CHART_VERSION, func, kwargs)
+        jobs = [job for job in jobs if not manifest.is_current(job[1]["path"], digests[job[1]["path"]])]
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        written = [_render(job) for job in jobs]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            written = list(pool.map(_render, jobs))
+    if manifest is not None:
+        for path in written:
+            manifest.record(path, digests[path])
+    return paths
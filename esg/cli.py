@@ -0,0 +1,152 @@
+"""Command-line entry point: ``python -m esg <command>``.
+
+Only the standard library is imported up front. ``backtest``, ``refresh``
+and ``render`` run the existing scripts (which pull in pandas, matplotlib and
+the market-data client when they execute); ``status`` reads the local caches
+with sqlite3 and json alone, so it answers without loading any of them.
+``calendar`` reports the last completed NYSE session (numpy only), which the
+scheduled workflows use to skip weekends and exchange holidays.
+"""
+import argparse
+import json
+import os
+import runpy
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+_STARTED = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {"backtest": "main.py", "refresh": "update_data.py"}
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "yfinance", "aiohttp")
+STATUS_BUDGET = 0.5  # seconds
+
+
+def _run_script(name, extra_args=()):
+    path = os.path.join(ROOT, SCRIPTS[name])
+    sys.argv = [path, *extra_args]
+    runpy.run_path(path, run_name="__main__")
+    return 0
+
+
+def _query(path, sql):
+    """Run one read-only query, or return None if the database is missing"""
+    if not os.path.exists(path):
+        return None
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+        try:
+            return conn.execute(sql).fetchone()
+        except sqlite3.Error:
+            return None
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def status():
+    """Freshness of the price cache, metrics state, news store and published outputs"""
+    price_db = os.getenv("ESG_PRICE_DB", os.path.join("data", "prices.sqlite"))
+    row = _query(price_db, "SELECT COUNT(*), MAX(end) FROM coverage")
+    if row and row[0]:
+        print(f"Prices:    {row[0]} tickers cached up to {row[1]} (exclusive) in {price_db}")
+    else:
+        print(f"Prices:    no cache at {price_db}")
+
+    state = _read_json(os.path.join("data", "metrics_state.json")) or {}
+    for name, acc in sorted(state.items()):
+        print(f"Metrics:   {name} through {acc.get('last_date')}")
+    if not state:
+        print("Metrics:   no saved state")
+
+    row = _query(os.path.join("data", "news.sqlite"), "SELECT COUNT(*), MAX(published_at) FROM articles")
+    if row and row[0]:
+        print(f"News:      {row[0]} articles, newest {row[1]}")
+    else:
+        print("News:      no stored articles")
+
+    published = _read_json(os.path.join("docs", "portfolio.json")) or {}
+    print(f"Dashboard: data {published.get('data_date', '-')}, updated {published.get('last_updated', '-')}")
+    manifest = _read_json(os.path.join("data", "output_manifest.json")) or {}
+    print(f"Outputs:   {len(manifest)} tracked in data/output_manifest.json")
+    return 0
+
+
+def calendar(check=False, now=None):
+    """Print the last completed NYSE session; with check, fail unless one closed today"""
+    from datetime import datetime
+
+    from esg.trading_calendar import default_calendar
+
+    cal = default_calendar()
+    now = datetime.fromisoformat(now) if now else None
+    session = cal.last_completed_session(now)
+    traded = cal.session_completed_today(now)
+    print(f"Last completed session: {session} ({'closed today' if traded else 'no session closed today'})")
+    return 1 if check and not traded else 0
+
+
+def _process_elapsed():
+    """Seconds since this process started, interpreter start-up included
+
+    Read from /proc where available; elsewhere it counts from this module's
+    import, which misses the interpreter's own start-up.
+    """
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")  # field 22: start time in ticks
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - _STARTED
+
+
+def check_budget(budget=STATUS_BUDGET):
+    """Fail if this process loaded a heavy dependency or ran past budget seconds since it started"""
+    elapsed = _process_elapsed()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    if loaded or elapsed > budget:
+        print(f"⚠ Start-up budget exceeded: {elapsed:.3f}s (budget {budget}s), loaded {loaded or 'nothing heavy'}")
+        return 1
+    print(f"✓ Finished in {elapsed:.3f}s without loading {', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="esg", description="ESG portfolio backtest and dashboard")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backtest = commands.add_parser("backtest", help="run the backtest and build docs/index.html (main.py)")
+    backtest.add_argument("--force", action="store_true", help="rebuild charts and HTML even if unchanged")
+    refresh = commands.add_parser("refresh", help="refresh live prices, news and docs/portfolio.json (update_data.py)")
+    refresh.add_argument("--force", action="store_true", help="redraw the chart even if unchanged")
+    commands.add_parser("render", help="redraw every chart and the dashboard, ignoring the output manifest")
+    bench = commands.add_parser("bench", help="time the hot paths on synthetic panels (see esg/bench.py)")
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER, help="arguments for python -m esg.bench")
+    check = commands.add_parser("status", help="show cache and output freshness without loading pandas")
+    check.add_argument("--budget", type=float, nargs="?", const=STATUS_BUDGET,
+                       help=f"exit non-zero if status takes longer than this (default {STATUS_BUDGET}s)")
+    sessions = commands.add_parser("calendar", help="last completed NYSE session, e.g. to skip runs on holidays")
+    sessions.add_argument("--check", action="store_true", help="exit 1 unless a session closed today (New York time)")
+    sessions.add_argument("--now", help="evaluate at this ISO time instead of now (naive times are New York time)")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        code = status()
+        if args.budget is not None:
+            code = check_budget(args.budget) or code
+        return code
+    if args.command == "calendar":
+        return calendar(args.check, args.now)
+    if args.command == "bench":
+        from esg.bench import main as bench_main
+        return bench_main(args.bench_args or ["run"])
+    if args.command == "render":
+        return _run_script("backtest", ["--force"])
+    return _run_script(args.command, ["--force"] if args.force else [])
@@ -0,0 +1,181 @@
+"""HTML and charts for the GitHub Pages dashboard (docs/index.html).
+
+``dashboard_html`` only builds the page from the results of the backtest's
+valuation, comparison and news stages; writing it is left to the caller, so
+the same code serves ``main.py`` and the benchmark suite.
+``DashboardRenderer`` writes the backtest charts and the page to an output
+directory, skipping charts whose inputs are unchanged.
+"""
+import filecmp
+import os
+import shutil
+
+from esg.charts import dashboard_chart, line_chart, render_charts
+from esg.manifest import DEFAULT_MANIFEST_PATH, OutputManifest
+
+CHART_FILES = ["dashboard_charts.png", "portfolio_vs_benchmarks.png", "cumulative_returns.png",
+               "portfolio_value.png", "rolling_sharpe.png", "drawdown.png"]
+
+
+def dashboard_html(valuation, comparison, news):
+    """Full dashboard page from the valuation, comparison and news stage results"""
+    weights = valuation["weights"]
+    quantities = valuation["quantities"]
+    first_prices = valuation["first_prices"]
+    last_day_prices = valuation["last_prices"]
+    prev_day_prices = valuation["prev_prices"]
+    company_names = news["names"]
+    news_data = news["headlines"]
+    last_val = comparison["last_val"]
+    daily_change_pct = comparison["daily_change_pct"]
+    bench_daily = comparison["bench_daily"]
+    metrics = comparison["metrics"]
+    arrow = "↑" if daily_change_pct > 0 else "↓"
+    color_daily = "#28a745" if daily_change_pct > 0 else "#dc3545"
+    price_change_colors = {
+        t: "#28a745" if last_day_prices[t] - prev_day_prices[t] > 0 else "#dc3545"
+        for t in weights
+    }
+
+    # Portfolio table rows
+    table_rows = ""
+    for t in weights.keys():
+        color = price_change_colors[t]
+        table_rows += f"""
+    <tr>
+        <td>{t}</td>
+        <td>{company_names[t]}</td>
+        <td>{weights[t]*100:.2f}%</td>
+        <td>{quantities[t]:.2f}</td>
+        <td>{first_prices[t]:.2f}</td>
+        <td style="color:{color}; font-weight:bold;">{last_day_prices[t]:.2f}</td>
+        <td>{news_data[t]}</td>
+    </tr>
+    """
+
+    # Performance snapshot card
+    perf_html = f"""
+<div style="padding:10px;background:#f1f3f5;border-radius:10px;margin-bottom:20px;">
+<h2>Current Portfolio Value: ${last_val:,.2f} <span style="color:{color_daily};">{arrow} {daily_change_pct:.2f}%</span></h2>
+<p>QQQ daily: {bench_daily['QQQ']:.2f}% | SPY daily: {bench_daily['SPY']:.2f}% | ESGU daily: {bench_daily['ESGU']:.2f}%</p>
+</div>
+"""
+
+    # Final HTML (UTF-8 safe)
+    html_content = f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>ESG Automation Portfolio</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; padding: 20px; background-color: #f8f9fa; }}
+        h1 {{ color: #2c3e50; }}
+        table {{ border-collapse: collapse; width: 100%; margin-bottom: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: center; }}
+        th {{ background-color: #2c3e50; color: white; }}
+        tr:nth-child(even) {{ background-color: #f2f2f2; }}
+        tr:hover {{ background-color: #ddd; }}
+        img {{ max-width: 100%; display: block; margin: auto; }}
+    </style>
+</head>
+<body>
+    <h1>ESG Automation Portfolio Dashboard</h1>
+
+    {perf_html}
+
+    <h2>Portfolio Allocation & News</h2>
+    <table>
+        <tr>
+            <th>Ticker</th><th>Name</th><th>Weight</th><th>Quantity</th>
+            <th>Initial Price</th><th>Last Price</th><th>News</th>
+        </tr>
+        {table_rows}
+    </table>
+
+    <h2>Portfolio vs Benchmarks (Metrics)</h2>
+    {metrics.to_html(classes="data", header=True)}
+
+    <h2>Multi-Timeframe Performance (%)</h2>
+    {comparison["comparison"].to_html(classes="data", header=True)}
+
+    <h2>Charts</h2>
+    <img src="charts/dashboard_charts.png" alt="Dashboard Charts">
+    <h3>Portfolio vs Benchmarks ($ Growth)</h3>
+    <img src="charts/portfolio_vs_benchmarks.png" alt="Portfolio vs Benchmarks">
+</body>
+</html>
+"""
+    return html_content
+
+
+class DashboardRenderer:
+    """Draws the backtest charts into work_dir, publishes them under output_dir and writes the page"""
+
+    def __init__(self, output_dir="docs", work_dir=os.path.join("outputs", "charts"), workers=None,
+                 manifest_path=DEFAULT_MANIFEST_PATH, force=None):
+        self.output_dir = output_dir
+        self.work_dir = work_dir
+        self.workers = workers
+        self.manifest_path = manifest_path
+        self.force = force
+        self.skipped = []
+
+    def chart_jobs(self, valuation, benchmarks, metrics, benchmark_names):
+        """[(chart_function, kwargs)] for every dashboard chart"""
+        portfolio_values = valuation["values"]
+        rolling_sharpe = metrics["rolling_sharpe"]
+        drawdown = metrics["drawdown"]
+        base_val = portfolio_values.iloc[0]
+        growth = {"Portfolio": portfolio_values / base_val * 100000}
+        for b in benchmark_names:
+            growth[b] = benchmarks[b] / benchmarks[b].iloc[0] * 100000
+        cumulative = {"Portfolio": portfolio_values / base_val - 1}
+        for b in benchmark_names:
+            cumulative[b] = benchmarks[b] / benchmarks[b].iloc[0] - 1
+
+        def path(name):
+            return os.path.join(self.work_dir, name)
+
+        return [
+            (dashboard_chart, {"path": path("dashboard_charts.png"), "values": portfolio_values,
+                               "rolling_sharpe": rolling_sharpe, "drawdown": drawdown}),
+            (line_chart, {"path": path("portfolio_vs_benchmarks.png"), "series": growth,
+                          "title": "Portfolio vs Benchmarks ($ Growth)", "ylabel": "Value ($)"}),
+            (line_chart, {"path": path("cumulative_returns.png"), "series": cumulative,
+                          "title": "Cumulative Returns"}),
+            (line_chart, {"path": path("portfolio_value.png"), "series": {"Portfolio": portfolio_values},
+                          "title": "Portfolio Value ($)", "ylabel": "Value ($)"}),
+            (line_chart, {"path": path("rolling_sharpe.png"), "series": {"Rolling Sharpe": rolling_sharpe},
+                          "title": "Rolling Sharpe Ratio"}),
+            (line_chart, {"path": path("drawdown.png"), "series": {"Drawdown": drawdown},
+                          "title": "Drawdown", "styles": {"Drawdown": {"color": "red"}}}),
+        ]
+
+    def charts(self, valuation, benchmarks, metrics, benchmark_names):
+        """Render changed charts, copy them to output_dir/charts and return the file names"""
+        os.makedirs(self.work_dir, exist_ok=True)
+        output_manifest = OutputManifest(self.manifest_path, force=self.force)
+        jobs = self.chart_jobs(valuation, benchmarks, metrics, benchmark_names)
+        chart_paths = render_charts(jobs, workers=self.workers, manifest=output_manifest)
+
+        published_dir = os.path.join(self.output_dir, "charts")
+        os.makedirs(published_dir, exist_ok=True)
+        for chart_path in chart_paths:
+            published = os.path.join(published_dir, os.path.basename(chart_path))
+            # update_data.py draws its own chart under the same published name, so an
+            # unchanged chart is still copied over a published file that differs
+            if not os.path.exists(published) or not filecmp.cmp(chart_path, published, shallow=False):
+                shutil.copy(chart_path, published)
+                output_manifest.entries.pop(published, None)
+        self.skipped = list(output_manifest.skipped)
+        output_manifest.save()
+        return [os.path.basename(path) for path in chart_paths]
+
+    def html(self, valuation, comparison, news):
+        """Write index.html under output_dir and return its path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, "index.html")
+        # FIX: Use UTF-8 encoding for file write (avoids UnicodeEncodeError)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(dashboard_html(valuation, comparison, news))
+        return path
@@ -0,0 +1,73 @@
+"""One price fetch per run, shared by every consumer of the run.
+
+Each consumer (the backtest holdings, the benchmarks, the latest-close
+lookup) declares the symbols and date range it needs with
+``FetchPlanner.add``. ``fetch`` tops up the price cache once for the union of
+symbols over the widest range, so a symbol wanted by two consumers (ESGU is
+both a holding and a benchmark) is requested once, and reads the result into
+a single ``PricePanel``. ``view(name)`` then hands each consumer its rows and
+columns of that panel.
+
+Symbols are laid out so each consumer's columns are adjacent: ones used by
+the first consumer only, then ones it shares with later consumers, and so
+on. For the usual case of consumers that overlap in a chain, every view is a
+slice of the shared array rather than a copy.
+"""
+import pandas as pd
+
+from esg.price_store import PriceStore
+
+
+class FetchPlanner:
+    """Collects consumer requests and serves them from one fetched panel"""
+
+    def __init__(self, store=None, field="Adj Close", path=None):
+        self.store = store
+        self.field = field
+        self.path = path
+        self.consumers = {}
+        self.panel = None
+
+    def add(self, name, tickers, start, end=None):
+        """Register a consumer of tickers over [start, end); end None means up to today"""
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        end = None if end is None else pd.Timestamp(end).strftime("%Y-%m-%d")
+        self.consumers[name] = (list(dict.fromkeys(tickers)), start, end)
+        self.panel = None
+        return self
+
+    def symbols(self):
+        """Union of the consumers' symbols, grouped so each consumer's columns are adjacent"""
+        members = {}
+        for position, (tickers, _, _) in enumerate(self.consumers.values()):
+            for ticker in tickers:
+                members.setdefault(ticker, []).append(position)
+        # Stable sort by (first consumer, last consumer): A-only, A and B, B-only, ...
+        return sorted(members, key=lambda t: (members[t][0], members[t][-1]))
+
+    def window(self):
+        """Earliest start and latest end over all consumers (None end wins: up to today)"""
+        starts = [start for _, start, _ in self.consumers.values()]
+        ends = [end for _, _, end in self.consumers.values()]
+        return min(starts), None if None in ends else max(ends)
+
+    def fetch(self):
+        """Top up the cache for the union once and read it into one panel"""
+        store = self.store or PriceStore()
+        symbols = self.symbols()
+        start, end = self.window()
+        store.update(symbols, start, end)
+        self.panel = store.panel(symbols, start, end, field=self.field, path=self.path)
+        return self.panel
+
+    def view(self, name):
+        """The named consumer's rows and columns of the fetched panel"""
+        if self.panel is None:
+            self.fetch()
+        tickers, start, end = self.consumers[name]
+        wanted = set(tickers)
+        return self.panel.between(start, end).select([t for t in self.panel.tickers if t in wanted])
+
+    def views(self):
+        """{consumer: view} for every consumer, fetching first if needed"""
+        return {name: self.view(name) for name in self.consumers}
@@ -0,0 +1,219 @@
+"""Per-stage and per-call timing, memory and network accounting.
+
+``recorder`` is the process-wide ``RunRecorder``. Pipeline stages run inside
+``recorder.stage(name)``, which records wall time, CPU time of the stage's
+thread, the peak RSS of the whole process so far when the stage ends and,
+when ``ESG_TRACEMALLOC=1``, the change in memory traced across the process
+while it ran. Stages share one process and run concurrently on threads, so
+the two memory figures are not the stage's own use. Every market-data or
+NewsAPI request goes through ``recorder.call(kind)`` (see
+``InstrumentedProvider`` in ``esg/providers.py``), which counts calls,
+errors, time and payload bytes, both per call kind and per stage.
+
+The current stage is held in a context variable. Code that fans work out to
+its own thread pool wraps the worker with ``in_context`` so calls made on
+those threads are still charged to the stage. ``write_report`` saves the
+run as JSON under ``data/reports`` (the workflows upload it as a build
+artifact rather than committing it), and ``write_prometheus`` writes a node-exporter textfile when
+``ESG_PROMETHEUS_DIR`` is set. Only the standard library is used.
+"""
+import contextvars
+import json
+import math
+import numbers
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROMETHEUS_DIR = os.getenv("ESG_PROMETHEUS_DIR")
+REPORT_DIR = os.path.join("data", "reports")  # per-run timings; not published with docs/
+
+_current_stage = contextvars.ContextVar("esg_stage", default=None)
+
+
+def in_context(func):
+    """Wrap func so each call runs in a copy of the caller's context (stage attribution)"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def payload_size(payload):
+    """Approximate decoded size of a response: JSON length, or a frame's memory"""
+    if payload is None:
+        return 0
+    if hasattr(payload, "memory_usage"):
+        return int(payload.memory_usage(index=True, deep=False).sum())
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _call_totals():
+    return {"count": 0, "errors": 0, "seconds": 0.0, "bytes": 0}
+
+
+def _sample(value):
+    """Exposition-format value at full precision: integers as integers, floats round-trippable"""
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class RunRecorder:
+    """Collects stage and external-call measurements for one run"""
+
+    def __init__(self, trace_memory=None):
+        self.started = time.time()
+        self.stages = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+        if trace_memory is None:
+            trace_memory = os.getenv("ESG_TRACEMALLOC") == "1"
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the block as stage name; the yielded entry takes extra fields such as 'reused'"""
+        token = _current_stage.set(name)
+        entry = {"wall": 0.0, "cpu": 0.0, "reused": False, "calls": 0, "bytes": 0}
+        with self._lock:
+            self.stages[name] = entry
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield entry
+        finally:
+            entry["wall"] = time.perf_counter() - wall
+            entry["cpu"] = time.thread_time() - cpu
+            entry["process_peak_rss_mb"] = peak_rss_mb()
+            if traced is not None:
+                entry["process_tracemalloc_delta_mb"] = (tracemalloc.get_traced_memory()[0] - traced) / 2 ** 20
+            _current_stage.reset(token)
+
+    @contextmanager
+    def call(self, kind, requests=1):
+        """Time one external call (or a batch of requests); set result['bytes'] inside"""
+        result = {"bytes": 0}
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stage = _current_stage.get()
+            with self._lock:
+                totals = self.calls.setdefault(kind, _call_totals())
+                totals["count"] += requests
+                totals["errors"] += int(failed)
+                totals["seconds"] += elapsed
+                totals["bytes"] += result["bytes"]
+                if stage in self.stages:
+                    self.stages[stage]["calls"] += requests
+                    self.stages[stage]["bytes"] += result["bytes"]
+
+    def report(self, run):
+        usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+        children = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+        summary = {
+            "run": run,
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "wall_seconds": round(time.time() - self.started, 3),
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3) if usage else None,
+            "child_cpu_seconds": round(children.ru_utime + children.ru_stime, 3) if children else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "calls": self.calls,
+        }
+        if tracemalloc.is_tracing():
+            summary["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        return summary
+
+    def write_report(self, run, path=None):
+        """Save the run report as JSON (data/reports/<run>.json by default) and any Prometheus textfile"""
+        path = path or os.path.join(REPORT_DIR, f"{run}.json")
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        summary = self.report(run)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, default=str)
+        os.replace(tmp, path)
+        if PROMETHEUS_DIR:
+            self.write_prometheus(os.path.join(PROMETHEUS_DIR, f"esg_{run}.prom"), summary)
+        return summary
+
+    def write_prometheus(self, path, summary):
+        """node_exporter textfile-collector metrics for the run"""
+        run = summary["run"]
+        gauges = [
+            ("esg_run_wall_seconds", "Wall time of the whole run", [({}, summary["wall_seconds"])]),
+            ("esg_run_cpu_seconds", "CPU time of the run, excluding child processes", [({}, summary["cpu_seconds"])]),
+            ("esg_run_peak_rss_megabytes", "Peak resident set size", [({}, summary["peak_rss_mb"])]),
+            ("esg_run_last_completed_timestamp_seconds", "Unix time the run finished", [({}, time.time())]),
+            ("esg_stage_wall_seconds", "Wall time per pipeline stage",
+             [({"stage": s}, e["wall"]) for s, e in summary["stages"].items()]),
+            ("esg_stage_cpu_seconds", "CPU time of the thread running the stage",
+             [({"stage": s}, e["cpu"]) for s, e in summary["stages"].items()]),
+            ("esg_stage_reused", "1 if the stage result came from the artifact cache",
+             [({"stage": s}, int(e["reused"])) for s, e in summary["stages"].items()]),
+            ("esg_stage_process_peak_rss_megabytes",
+             "Peak RSS of the whole process when the stage finished (not the stage's own use)",
+             [({"stage": s}, e.get("process_peak_rss_mb")) for s, e in summary["stages"].items()]),
+            ("esg_stage_process_tracemalloc_delta_megabytes",
+             "Change in traced memory of the whole process while the stage ran (ESG_TRACEMALLOC=1)",
+             [({"stage": s}, e.get("process_tracemalloc_delta_mb")) for s, e in summary["stages"].items()]),
+            ("esg_external_calls", "External requests made", [({"kind": k}, c["count"]) for k, c in summary["calls"].items()]),
+            ("esg_external_errors", "External requests that raised", [({"kind": k}, c["errors"]) for k, c in summary["calls"].items()]),
+            ("esg_external_seconds", "Time spent in external requests", [({"kind": k}, c["seconds"]) for k, c in summary["calls"].items()]),
+            ("esg_external_bytes", "Decoded payload bytes received", [({"kind": k}, c["bytes"]) for k, c in summary["calls"].items()]),
+        ]
+        lines = []
+        for name, help_text, samples in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                labels = {"run": run, **labels}
+                rendered = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{rendered}}} {_sample(value)}")
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Write then rename so node_exporter never reads a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+
+recorder = RunRecorder()
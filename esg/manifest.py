@@ -0,0 +1,106 @@
+"""Skip regenerating outputs whose inputs have not changed.
+
+Each output stage (a chart, the HTML dashboard) hashes everything it is built
+from, the data slice, its configuration and a template version, and records
+the digest in ``data/output_manifest.json``. On the next run a stage whose
+digest matches and whose files still exist is skipped, so weekend and holiday
+runs with no new bar leave the PNGs and HTML untouched. Set
+``ESG_FORCE_REBUILD=1`` or pass ``--force`` to rebuild everything.
+"""
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from esg.panel import PricePanel
+from esg.rolling import RollingStats
+
+DEFAULT_MANIFEST_PATH = os.path.join("data", "output_manifest.json")
+
+
+def force_requested():
+    return os.getenv("ESG_FORCE_REBUILD") == "1" or "--force" in sys.argv[1:]
+
+
+def _feed(digest, value):
+    """Hash value into digest, recursing into containers in a stable order"""
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        digest.update(repr(type(value).__name__).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr(list(names)).encode())
+    elif isinstance(value, PricePanel):
+        digest.update(b"PricePanel")
+        _feed(digest, value.tickers)
+        _feed(digest, value.dates.view(np.int64))
+        for lo, hi in value.row_chunks():
+            _feed(digest, value.values[lo:hi])
+    elif isinstance(value, RollingStats):
+        digest.update(b"RollingStats")
+        _feed(digest, [value.names, list(value.windows), value.statistics])
+        _feed(digest, value.dates.view(np.int64))
+        _feed(digest, value.values)
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            _feed(digest, key)
+            _feed(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _feed(digest, item)
+        digest.update(b"]")
+    elif callable(value):
+        digest.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def fingerprint(*parts):
+    """Stable sha1 hex digest of data slices, config values and version strings"""
+    digest = hashlib.sha1()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+class OutputManifest:
+    """Input digests of the outputs written by the previous run"""
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, force=None):
+        self.path = path
+        self.force = force_requested() if force is None else force
+        self.entries = {}
+        self.skipped = []
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable output manifest {path}: {e}")
+
+    def is_current(self, output, digest):
+        """True if output exists and was last built from inputs with this digest"""
+        current = not self.force and self.entries.get(output) == digest and os.path.exists(output)
+        if current:
+            self.skipped.append(output)
+        return current
+
+    def record(self, output, digest):
+        self.entries[output] = digest
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -0,0 +1,115 @@
+"""Company metadata lookups with a thread pool and a TTL disk cache.
+
+``.info`` is the slowest yfinance call and names almost never change, so the
+static fields are cached in ``data/metadata.json`` and only refreshed once an
+entry is older than the TTL. Concurrent callers asking for the same ticker
+share one in-flight fetch.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from esg.instrument import in_context
+from esg.providers import get_provider
+
+DEFAULT_CACHE_PATH = os.path.join("data", "metadata.json")
+DEFAULT_TTL = int(os.getenv("ESG_METADATA_TTL", 7 * 24 * 3600))  # seconds
+DEFAULT_WORKERS = 8
+STATIC_FIELDS = (
+    "longName", "shortName", "quoteType", "sector", "industry",
+    "country", "exchange", "currency", "website",
+)
+
+
+class MetadataService:
+    """Fetch and cache static company fields for many tickers at once"""
+
+    def __init__(self, provider=None, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_workers=DEFAULT_WORKERS):
+        self.provider = provider or get_provider()
+        self.path = path
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # ticker -> Future of a fetch started by another caller
+        self._cache = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable metadata cache {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _fresh(self, entry, now):
+        return entry is not None and now - entry.get("fetched_at", 0) < self.ttl
+
+    def _fetch(self, ticker):
+        """Fetch one ticker's static fields, or None if the lookup failed"""
+        try:
+            info = self.provider.info(ticker) or {}
+        except Exception as e:
+            print(f"⚠ Failed to fetch info for {ticker}: {e}")
+            return None
+        return {k: info[k] for k in STATIC_FIELDS if info.get(k) is not None}
+
+    def get_many(self, tickers):
+        """Return {ticker: static fields}, fetching only expired or unknown tickers"""
+        now = time.time()
+        tickers = list(dict.fromkeys(tickers))
+        with self._lock:
+            stale = [t for t in tickers if not self._fresh(self._cache.get(t), now)]
+            # Tickers another caller is already fetching are waited for, not fetched again
+            waiting = [self._pending[t] for t in stale if t in self._pending]
+            todo = [t for t in stale if t not in self._pending]
+            for ticker in todo:
+                self._pending[ticker] = Future()
+            self.hits += len(tickers) - len(stale)
+            self.shared += len(waiting)
+            self.misses += len(todo)
+
+        if todo:
+            try:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+                    fetched = dict(zip(todo, pool.map(in_context(self._fetch), todo)))
+                with self._lock:
+                    for ticker, fields in fetched.items():
+                        if fields is None:
+                            # Keep serving an expired entry rather than nothing
+                            self.errors += 1
+                            continue
+                        self._cache[ticker] = {"fetched_at": now, "fields": fields}
+                    self._save()
+            finally:
+                with self._lock:
+                    for ticker in todo:
+                        self._pending.pop(ticker).set_result(None)
+        for future in waiting:
+            future.result()
+
+        return {t: self._cache.get(t, {}).get("fields", {}) for t in tickers}
+
+    def names(self, tickers):
+        """Return {ticker: longName}, falling back to the ticker symbol"""
+        return {t: fields.get("longName", t) for t, fields in self.get_many(tickers).items()}
+
+    def stats(self):
+        """Cache hit/miss/error counters since this service was created (shared: joined another caller's fetch)"""
+        return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "errors": self.errors}
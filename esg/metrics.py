@@ -0,0 +1,218 @@
+"""Incremental performance metrics that persist their running state between runs.
+
+``MetricsAccumulator`` folds one value at a time into running state: first and
+last value, a Welford mean/variance of daily returns, the running peak and
+drawdown, and a rolling-window buffer with its running sums. Appending a day
+is O(1) per metric. ``MetricsEngine`` keeps one accumulator per named series
+in ``data/metrics_state.json`` and only appends the bars that are new since
+the last run, rebuilding from scratch if stored history no longer matches.
+``full_recompute`` computes the same figures with pandas for cross-checking.
+"""
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STATE_PATH = os.path.join("data", "metrics_state.json")
+PERIODS_PER_YEAR = 252
+DEFAULT_WINDOW = 126  # ~6 months
+MATCH_TOLERANCE = 1e-9
+
+
+class MetricsAccumulator:
+    """Running CAGR, volatility, Sharpe, drawdown and rolling Sharpe for one series"""
+
+    def __init__(self, window=DEFAULT_WINDOW, periods=PERIODS_PER_YEAR):
+        self.window = window
+        self.periods = periods
+        self.first_date = None
+        self.last_date = None
+        self.first = None
+        self.last = None
+        self.n_returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.buffer = deque()
+        self.win_sum = 0.0
+        self.win_sumsq = 0.0
+        self.history = {"date": [], "drawdown": [], "rolling_sharpe": []}
+
+    def append(self, date, value):
+        """Fold one new observation into the running state"""
+        date = pd.Timestamp(date).strftime("%Y-%m-%d")
+        value = float(value)
+        if self.last is None:
+            self.first_date, self.first, self.peak = date, value, value
+            rolling = math.nan
+        else:
+            r = value / self.last - 1
+            # Welford update of the daily-return mean and variance
+            self.n_returns += 1
+            delta = r - self.mean
+            self.mean += delta / self.n_returns
+            self.m2 += delta * (r - self.mean)
+            # Rolling window: add the new return, evict the oldest
+            self.buffer.append(r)
+            self.win_sum += r
+            self.win_sumsq += r * r
+            if len(self.buffer) > self.window:
+                old = self.buffer.popleft()
+                self.win_sum -= old
+                self.win_sumsq -= old * old
+            rolling = self._rolling_sharpe()
+        self.last_date, self.last = date, value
+        self.peak = max(self.peak, value)
+        self.drawdown = value / self.peak - 1
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        self.history["date"].append(date)
+        self.history["drawdown"].append(self.drawdown)
+        self.history["rolling_sharpe"].append(rolling)
+
+    def extend(self, series):
+        """Append every observation of a date-indexed series"""
+        for date, value in series.items():
+            self.append(date, value)
+        return self
+
+    def _rolling_sharpe(self):
+        w = len(self.buffer)
+        if w < self.window:
+            return math.nan
+        var = (self.win_sumsq - self.win_sum * self.win_sum / w) / (w - 1)
+        if var <= 0:
+            return math.nan
+        return (self.win_sum / w * self.periods) / (math.sqrt(var) * math.sqrt(self.periods))
+
+    def snapshot(self):
+        """Current metric values as a dict of floats"""
+        if self.n_returns < 2:
+            nan = math.nan
+            return {"total_return": nan, "cagr": nan, "annual_return": nan, "volatility": nan,
+                    "sharpe": nan, "max_drawdown": self.max_drawdown, "drawdown": self.drawdown,
+                    "rolling_sharpe": nan}
+        cagr = (self.last / self.first) ** (self.periods / self.n_returns) - 1
+        volatility = math.sqrt(self.m2 / (self.n_returns - 1)) * math.sqrt(self.periods)
+        return {
+            "total_return": self.last / self.first - 1,
+            "cagr": cagr,
+            "annual_return": self.mean * self.periods,
+            "volatility": volatility,
+            "sharpe": cagr / volatility,
+            "max_drawdown": self.max_drawdown,
+            "drawdown": self.drawdown,
+            "rolling_sharpe": self.history["rolling_sharpe"][-1],
+        }
+
+    def series(self, name):
+        """Per-day history ('drawdown' or 'rolling_sharpe') as a pandas Series"""
+        index = pd.DatetimeIndex(self.history["date"], name="Date")
+        return pd.Series(self.history[name], index=index, name=name)
+
+    def to_dict(self):
+        state = {k: v for k, v in vars(self).items() if k not in ("buffer", "win_sum", "win_sumsq")}
+        state["buffer"] = list(self.buffer)
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls(window=state["window"], periods=state["periods"])
+        for key, value in state.items():
+            if key != "buffer":
+                setattr(acc, key, value)
+        # Re-derive the window sums from the buffer so rounding drift never persists
+        acc.buffer = deque(state["buffer"])
+        acc.win_sum = math.fsum(acc.buffer)
+        acc.win_sumsq = math.fsum(r * r for r in acc.buffer)
+        return acc
+
+    def matches(self, series):
+        """True if series starts like this state and contains its last observation"""
+        if self.last_date is None or series.empty:
+            return False
+        dates = series.index.strftime("%Y-%m-%d")
+        if dates[0] != self.first_date or self.last_date not in dates:
+            return False
+        first_ok = math.isclose(series.iloc[0], self.first, rel_tol=MATCH_TOLERANCE)
+        last_ok = math.isclose(series.iloc[dates.get_loc(self.last_date)], self.last, rel_tol=MATCH_TOLERANCE)
+        return first_ok and last_ok
+
+
+def full_recompute(series, window=DEFAULT_WINDOW, periods=PERIODS_PER_YEAR):
+    """Same metrics as MetricsAccumulator.snapshot, computed over the full history"""
+    returns = series.pct_change().dropna()
+    cagr = (series.iloc[-1] / series.iloc[0]) ** (periods / len(returns)) - 1
+    volatility = returns.std() * np.sqrt(periods)
+    drawdown = series / series.cummax() - 1
+    rolling = (returns.rolling(window).mean() * periods) / (returns.rolling(window).std() * np.sqrt(periods))
+    return {
+        "total_return": series.iloc[-1] / series.iloc[0] - 1,
+        "cagr": cagr,
+        "annual_return": returns.mean() * periods,
+        "volatility": volatility,
+        "sharpe": cagr / volatility,
+        "max_drawdown": drawdown.min(),
+        "drawdown": drawdown.iloc[-1],
+        "rolling_sharpe": rolling.iloc[-1],
+    }
+
+
+class MetricsEngine:
+    """Named accumulators persisted to disk (unless path is None) and topped up with new bars"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH, window=DEFAULT_WINDOW, periods=PERIODS_PER_YEAR):
+        self.path = path
+        self.window = window
+        self.periods = periods
+        self.accumulators = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    saved = json.load(f)
+                self.accumulators = {k: MetricsAccumulator.from_dict(v) for k, v in saved.items()}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠ Ignoring unreadable metrics state {path}: {e}")
+
+    def update(self, name, series, full=False):
+        """Bring the named accumulator up to date with series and return it"""
+        series = series.dropna()
+        acc = self.accumulators.get(name)
+        fresh = (
+            full or acc is None or (acc.window, acc.periods) != (self.window, self.periods)
+            or not acc.matches(series)
+        )
+        if fresh:
+            acc = MetricsAccumulator(self.window, self.periods).extend(series)
+        else:
+            acc.extend(series[series.index > pd.Timestamp(acc.last_date)])
+        self.accumulators[name] = acc
+        return acc
+
+    def check(self, name, series, rel_tol=1e-8):
+        """Compare the incremental state for name with a full recompute; returns mismatches"""
+        incremental = self.accumulators[name].snapshot()
+        reference = full_recompute(series.dropna(), self.window, self.periods)
+        return {
+            key: (incremental[key], reference[key])
+            for key in reference
+            if not (
+                (math.isnan(incremental[key]) and math.isnan(reference[key]))
+                or math.isclose(incremental[key], reference[key], rel_tol=rel_tol, abs_tol=1e-12)
+            )
+        }
+
+    def save(self):
+        if not self.path:
+            return  # in-memory engine (path=None), e.g. in a long-lived worker
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({k: acc.to_dict() for k, acc in self.accumulators.items()}, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,97 @@
+"""Asynchronous NewsAPI client.
+
+All queries of a run share one pooled aiohttp session and run concurrently,
+bounded by a semaphore and a requests-per-second limit. Every request has
+its own timeout and the whole batch has a deadline, after which unfinished
+queries are cancelled and reported as errors instead of blocking the job.
+"""
+import asyncio
+import time
+
+import aiohttp
+
+from esg.providers import NEWSAPI_URL
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 5.0  # requests per second
+DEFAULT_REQUEST_TIMEOUT = 10.0  # seconds
+DEFAULT_BATCH_TIMEOUT = 30.0  # seconds
+
+
+def _error(message):
+    """NewsAPI-shaped error payload, so callers handle failures uniformly"""
+    return {"status": "error", "message": message, "articles": []}
+
+
+class RateLimiter:
+    """Space request starts at least 1/rate seconds apart"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncNewsClient:
+    """Run many NewsAPI /v2/everything queries over one pooled session"""
+
+    def __init__(
+        self,
+        url=NEWSAPI_URL,
+        max_concurrency=DEFAULT_CONCURRENCY,
+        rate=DEFAULT_RATE,
+        request_timeout=DEFAULT_REQUEST_TIMEOUT,
+        batch_timeout=DEFAULT_BATCH_TIMEOUT,
+    ):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.request_timeout = request_timeout
+        self.batch_timeout = batch_timeout
+
+    async def _fetch(self, session, semaphore, limiter, params):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                async with session.get(self.url, params=params) as response:
+                    return await response.json(content_type=None)
+            except asyncio.TimeoutError:
+                return _error(f"request timed out after {self.request_timeout}s")
+            except (aiohttp.ClientError, ValueError) as e:
+                return _error(str(e))
+
+    async def fetch_all(self, param_list):
+        """Return one decoded response per params dict, in input order"""
+        if not param_list:
+            return []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = RateLimiter(self.rate)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = [asyncio.create_task(self._fetch(session, semaphore, limiter, p)) for p in param_list]
+            done, pending = await asyncio.wait(tasks, timeout=self.batch_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return [self._outcome(task, done) for task in tasks]
+
+    def _outcome(self, task, done):
+        if task not in done:
+            return _error(f"batch deadline of {self.batch_timeout}s exceeded")
+        if task.exception() is not None:
+            return _error(str(task.exception()))
+        return task.result()
+
+    def run(self, param_list):
+        """Blocking wrapper around fetch_all for synchronous callers"""
+        return asyncio.run(self.fetch_all(list(param_list)))
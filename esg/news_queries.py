@@ -0,0 +1,79 @@
+"""Pack many tickers into each NewsAPI query and attribute results locally.
+
+One ``(name OR alias OR ...) AND (ESG terms)`` query with a large page size
+replaces a ``pageSize=1`` query per ticker. Returned articles are assigned to
+tickers by matching company names and aliases in the title and description,
+so the number of requests falls from N to roughly N / tickers_per_query.
+"""
+import re
+
+ESG_TERMS = '(ESG OR sustainability OR environmental OR governance OR "social responsibility")'
+MAX_QUERY_LENGTH = 500  # NewsAPI limit on the q parameter
+DEFAULT_TICKERS_PER_QUERY = 8
+DEFAULT_PAGE_SIZE = 100  # NewsAPI maximum
+
+_NAME_SUFFIX = re.compile(
+    r"[,\s]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|holdings?|group|n\.?v|s\.?a)\.?$",
+    re.IGNORECASE,
+)
+
+
+def _strip_suffixes(name):
+    """'Emerson Electric Co.' -> 'Emerson Electric'"""
+    name = name.strip()
+    while True:
+        stripped = _NAME_SUFFIX.sub("", name).strip(" ,.")
+        if stripped == name:
+            return name
+        name = stripped
+
+
+def company_aliases(fields, extra=()):
+    """Search names for one company from its cached metadata fields"""
+    names = [_strip_suffixes(fields[k]) for k in ("longName", "shortName") if fields.get(k)]
+    names += list(extra)
+    return [n for n in dict.fromkeys(names) if len(n) > 2]
+
+
+def _term(alias):
+    return f'"{alias}"' if " " in alias or "-" in alias else alias
+
+
+def _group_query(group, aliases):
+    terms = []
+    for ticker in group:
+        terms += [_term(a) for a in aliases.get(ticker, [])] + [ticker]
+    return f"({' OR '.join(dict.fromkeys(terms))}) AND {ESG_TERMS}"
+
+
+def plan_news_queries(tickers, aliases, per_query=DEFAULT_TICKERS_PER_QUERY, max_length=MAX_QUERY_LENGTH):
+    """Split tickers into [(query, [tickers])] groups within NewsAPI's query limit"""
+    plan, group = [], []
+    for ticker in tickers:
+        candidate = group + [ticker]
+        if group and (len(candidate) > per_query or len(_group_query(candidate, aliases)) > max_length):
+            plan.append((_group_query(group, aliases), group))
+            candidate = [ticker]
+        group = candidate
+    if group:
+        plan.append((_group_query(group, aliases), group))
+    return plan
+
+
+def _matcher(ticker, names):
+    """Regex matching a company name (any case) or its ticker symbol (exact case)"""
+    parts = [rf"(?i:\b{re.escape(n)}\b)" for n in names]
+    parts.append(rf"(?<!\w){re.escape(ticker)}\b")
+    return re.compile("|".join(parts))
+
+
+def attribute_articles(articles, aliases):
+    """Return {ticker: [articles mentioning it]} preserving the response order"""
+    matchers = {t: _matcher(t, names) for t, names in aliases.items()}
+    matched = {t: [] for t in aliases}
+    for article in articles:
+        text = f"{article.get('title') or ''} {article.get('description') or ''}"
+        for ticker, pattern in matchers.items():
+            if pattern.search(text):
+                matched[ticker].append(article)
+    return matched
@@ -0,0 +1,187 @@
+"""Local store of fetched news articles.
+
+Articles are kept in SQLite keyed by a hash of their normalised URL and linked
+to the tickers they mention. Syndicated copies of the same story (same title,
+different outlet URL) are collapsed through a title fingerprint. Each ticker
+has a watermark: the later of its newest stored ``publishedAt`` and the time
+its last complete fetch was sent, so the next run asks NewsAPI only for newer
+articles even for tickers with no recent news. The dashboard reads headlines
+from here instead of the network.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, UTC
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_DB_PATH = os.path.join("data", "news.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id           TEXT PRIMARY KEY,
+    fingerprint  TEXT NOT NULL,
+    url          TEXT NOT NULL,
+    title        TEXT NOT NULL,
+    description  TEXT,
+    source       TEXT,
+    published_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_fingerprint ON articles (fingerprint);
+CREATE TABLE IF NOT EXISTS article_tickers (
+    article_id TEXT NOT NULL REFERENCES articles (id),
+    ticker     TEXT NOT NULL,
+    PRIMARY KEY (article_id, ticker)
+);
+CREATE TABLE IF NOT EXISTS fetched (
+    ticker  TEXT PRIMARY KEY,
+    through TEXT NOT NULL
+);
+"""
+
+
+def _utc_iso(value):
+    """Normalise datetimes and NewsAPI timestamps to 'YYYY-MM-DDTHH:MM:SSZ'"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def url_id(url):
+    """Hash of a URL without query string, fragment or trailing slash"""
+    parts = urlsplit(url.strip())
+    clean = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+    return hashlib.sha1(clean.encode()).hexdigest()
+
+
+def title_fingerprint(title):
+    """Hash of a headline with case, punctuation and ' - Outlet' suffixes removed"""
+    title = re.sub(r"\s+[-|–]\s+[^-|–]+$", "", title or "")
+    words = re.findall(r"[a-z0-9]+", title.lower())
+    return hashlib.sha1(" ".join(words).encode()).hexdigest()
+
+
+class NewsStore:
+    """SQLite-backed article store with per-ticker 'last seen' watermarks"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def last_seen(self, tickers):
+        """Return {ticker: newest stored publishedAt} for tickers with articles"""
+        marks = ",".join("?" * len(tickers))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT t.ticker, MAX(a.published_at) FROM article_tickers t "
+                f"JOIN articles a ON a.id = t.article_id WHERE t.ticker IN ({marks}) GROUP BY t.ticker",
+                list(tickers),
+            ).fetchall()
+        return dict(rows)
+
+    def fetched_through(self, tickers):
+        """Return {ticker: send time of its last complete fetch} for tickers fetched before"""
+        marks = ",".join("?" * len(tickers))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT ticker, through FROM fetched WHERE ticker IN ({marks})",
+                                list(tickers)).fetchall()
+        return dict(rows)
+
+    def mark_fetched(self, tickers, through):
+        """Record that every article for tickers published before through has been requested"""
+        through = _utc_iso(through)
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO fetched (ticker, through) VALUES (?, ?) "
+                "ON CONFLICT (ticker) DO UPDATE SET through = MAX(through, excluded.through)",
+                [(t, through) for t in tickers],
+            )
+
+    def since(self, tickers, lookback_days):
+        """Oldest watermark across tickers, so one query covers every ticker in it"""
+        floor = _utc_iso(datetime.now(UTC) - timedelta(days=lookback_days))
+        seen, fetched = self.last_seen(tickers), self.fetched_through(tickers)
+        marks = [max(seen.get(t, floor), fetched.get(t, floor), floor) for t in tickers]
+        return min(marks) if marks else floor
+
+    def add(self, matched):
+        """Store {ticker: [NewsAPI articles]}; returns the number of new stories"""
+        added = 0
+        with closing(self._connect()) as conn, conn:
+            for ticker, articles in matched.items():
+                for article in articles:
+                    if not article.get("url") or not article.get("title") or not article.get("publishedAt"):
+                        continue
+                    article_id, is_new = self._insert(conn, article)
+                    added += is_new
+                    conn.execute(
+                        "INSERT OR IGNORE INTO article_tickers (article_id, ticker) VALUES (?, ?)",
+                        (article_id, ticker),
+                    )
+        return added
+
+    def _insert(self, conn, article):
+        """Insert one article unless it (or a syndicated copy) is stored; returns (id, is_new)"""
+        article_id = url_id(article["url"])
+        if conn.execute("SELECT 1 FROM articles WHERE id = ?", (article_id,)).fetchone():
+            return article_id, 0
+        fingerprint = title_fingerprint(article["title"])
+        copy = conn.execute("SELECT id FROM articles WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        if copy:
+            return copy[0], 0
+        conn.execute(
+            "INSERT INTO articles (id, fingerprint, url, title, description, source, published_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                article_id,
+                fingerprint,
+                article["url"],
+                article["title"],
+                article.get("description"),
+                (article.get("source") or {}).get("name"),
+                _utc_iso(article["publishedAt"]),
+            ),
+        )
+        return article_id, 1
+
+    def latest(self, tickers, max_age_days=None):
+        """Return {ticker: newest article dict} for tickers with stored news"""
+        marks = ",".join("?" * len(tickers))
+        params = list(tickers)
+        window = ""
+        if max_age_days is not None:
+            window = "AND a.published_at >= ?"
+            params.append(_utc_iso(datetime.now(UTC) - timedelta(days=max_age_days)))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT t.ticker, a.url, a.title, a.source, a.published_at FROM article_tickers t "
+                f"JOIN articles a ON a.id = t.article_id WHERE t.ticker IN ({marks}) {window} "
+                "ORDER BY a.published_at",
+                params,
+            ).fetchall()
+        # Ascending order, so the newest article per ticker wins
+        return {
+            ticker: {"url": url, "title": title, "source": source, "publishedAt": published}
+            for ticker, url, title, source, published in rows
+        }
+
+    def prune(self, older_than_days):
+        """Delete articles published more than older_than_days ago"""
+        cutoff = _utc_iso(datetime.now(UTC) - timedelta(days=older_than_days))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM article_tickers WHERE article_id IN "
+                "(SELECT id FROM articles WHERE published_at < ?)",
+                (cutoff,),
+            )
+            conn.execute("DELETE FROM articles WHERE published_at < ?", (cutoff,))
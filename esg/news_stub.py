@@ -0,0 +1,116 @@
+"""Local NewsAPI stand-in for exercising the news client without the network.
+
+Serves ``/v2/everything`` with deterministic fake articles derived from the
+query, after an optional artificial latency. Point the client at it with
+``ESG_NEWSAPI_URL``::
+
+    python -m esg.news_stub --port 8765 --latency 0.5
+    ESG_NEWSAPI_URL=http://127.0.0.1:8765/v2/everything NEWS_API_KEY=stub python update_data.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_articles(query, page_size):
+    """Deterministic NewsAPI article dicts for a query string"""
+    digest = hashlib.sha1(query.encode()).hexdigest()[:10]
+    subject = query.split(" ")[0].strip('()"')
+    now = datetime.now(UTC).replace(microsecond=0)
+    return [
+        {
+            "source": {"id": None, "name": "Stub Wire"},
+            "title": f"{subject} sustainability update #{i + 1}",
+            "url": f"https://stub.local/{digest}/{i + 1}",
+            "description": f"Stub article for query: {query}",
+            "publishedAt": (now - timedelta(hours=i)).isoformat().replace("+00:00", "Z"),
+        }
+        for i in range(page_size)
+    ]
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threading HTTP server that counts requests and the most it had in flight at once"""
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.started()
+            try:
+                self._respond()
+            finally:
+                self.server.finished()
+
+        def _respond(self):
+            url = urlparse(self.path)
+            if url.path != "/v2/everything":
+                self.send_error(404)
+                return
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if latency:
+                time.sleep(latency)
+            if not params.get("apiKey"):
+                body = {"status": "error", "code": "apiKeyMissing", "message": "No API key"}
+            else:
+                articles = fake_articles(params.get("q", ""), int(params.get("pageSize", 20)))
+                body = {"status": "ok", "totalResults": len(articles), "articles": articles}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0):
+    """Start the stub in a background thread; returns (StubServer, endpoint URL)"""
+    server = StubServer((host, port), _handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v2/everything"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake NewsAPI responses locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    args = parser.parse_args()
+    server = StubServer((args.host, args.port), _handler(args.latency))
+    print(f"Stub NewsAPI listening on http://{args.host}:{args.port}/v2/everything")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
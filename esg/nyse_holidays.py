@@ -0,0 +1,50 @@
+"""NYSE full-day holidays 2000-2040, generated by `python -m esg.trading_calendar`.
+
+Do not edit by hand; change the rules in esg/trading_calendar.py and regenerate.
+"""
+FIRST_YEAR = 2000
+LAST_YEAR = 2040
+
+HOLIDAYS = (
+    "2000-01-17", "2000-02-21", "2000-04-21", "2000-05-29", "2000-07-04", "2000-09-04", "2000-11-23", "2000-12-25",
+    "2001-01-01", "2001-01-15", "2001-02-19", "2001-04-13", "2001-05-28", "2001-07-04", "2001-09-03", "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14", "2001-11-22", "2001-12-25",
+    "2002-01-01", "2002-01-21", "2002-02-18", "2002-03-29", "2002-05-27", "2002-07-04", "2002-09-02", "2002-11-28", "2002-12-25",
+    "2003-01-01", "2003-01-20", "2003-02-17", "2003-04-18", "2003-05-26", "2003-07-04", "2003-09-01", "2003-11-27", "2003-12-25",
+    "2004-01-01", "2004-01-19", "2004-02-16", "2004-04-09", "2004-05-31", "2004-06-11", "2004-07-05", "2004-09-06", "2004-11-25", "2004-12-24",
+    "2005-01-17", "2005-02-21", "2005-03-25", "2005-05-30", "2005-07-04", "2005-09-05", "2005-11-24", "2005-12-26",
+    "2006-01-02", "2006-01-16", "2006-02-20", "2006-04-14", "2006-05-29", "2006-07-04", "2006-09-04", "2006-11-23", "2006-12-25",
+    "2007-01-01", "2007-01-02", "2007-01-15", "2007-02-19", "2007-04-06", "2007-05-28", "2007-07-04", "2007-09-03", "2007-11-22", "2007-12-25",
+    "2008-01-01", "2008-01-21", "2008-02-18", "2008-03-21", "2008-05-26", "2008-07-04", "2008-09-01", "2008-11-27", "2008-12-25",
+    "2009-01-01", "2009-01-19", "2009-02-16", "2009-04-10", "2009-05-25", "2009-07-03", "2009-09-07", "2009-11-26", "2009-12-25",
+    "2010-01-01", "2010-01-18", "2010-02-15", "2010-04-02", "2010-05-31", "2010-07-05", "2010-09-06", "2010-11-25", "2010-12-24",
+    "2011-01-17", "2011-02-21", "2011-04-22", "2011-05-30", "2011-07-04", "2011-09-05", "2011-11-24", "2011-12-26",
+    "2012-01-02", "2012-01-16", "2012-02-20", "2012-04-06", "2012-05-28", "2012-07-04", "2012-09-03", "2012-10-29", "2012-10-30", "2012-11-22", "2012-12-25",
+    "2013-01-01", "2013-01-21", "2013-02-18", "2013-03-29", "2013-05-27", "2013-07-04", "2013-09-02", "2013-11-28", "2013-12-25",
+    "2014-01-01", "2014-01-20", "2014-02-17", "2014-04-18", "2014-05-26", "2014-07-04", "2014-09-01", "2014-11-27", "2014-12-25",
+    "2015-01-01", "2015-01-19", "2015-02-16", "2015-04-03", "2015-05-25", "2015-07-03", "2015-09-07", "2015-11-26", "2015-12-25",
+    "2016-01-01", "2016-01-18", "2016-02-15", "2016-03-25", "2016-05-30", "2016-07-04", "2016-09-05", "2016-11-24", "2016-12-26",
+    "2017-01-02", "2017-01-16", "2017-02-20", "2017-04-14", "2017-05-29", "2017-07-04", "2017-09-04", "2017-11-23", "2017-12-25",
+    "2018-01-01", "2018-01-15", "2018-02-19", "2018-03-30", "2018-05-28", "2018-07-04", "2018-09-03", "2018-11-22", "2018-12-05", "2018-12-25",
+    "2019-01-01", "2019-01-21", "2019-02-18", "2019-04-19", "2019-05-27", "2019-07-04", "2019-09-02", "2019-11-28", "2019-12-25",
+    "2020-01-01", "2020-01-20", "2020-02-17", "2020-04-10", "2020-05-25", "2020-07-03", "2020-09-07", "2020-11-26", "2020-12-25",
+    "2021-01-01", "2021-01-18", "2021-02-15", "2021-04-02", "2021-05-31", "2021-07-05", "2021-09-06", "2021-11-25", "2021-12-24",
+    "2022-01-17", "2022-02-21", "2022-04-15", "2022-05-30", "2022-06-20", "2022-07-04", "2022-09-05", "2022-11-24", "2022-12-26",
+    "2023-01-02", "2023-01-16", "2023-02-20", "2023-04-07", "2023-05-29", "2023-06-19", "2023-07-04", "2023-09-04", "2023-11-23", "2023-12-25",
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27", "2024-06-19", "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26", "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18", "2027-07-05", "2027-09-06", "2027-11-25", "2027-12-24",
+    "2028-01-17", "2028-02-21", "2028-04-14", "2028-05-29", "2028-06-19", "2028-07-04", "2028-09-04", "2028-11-23", "2028-12-25",
+    "2029-01-01", "2029-01-15", "2029-02-19", "2029-03-30", "2029-05-28", "2029-06-19", "2029-07-04", "2029-09-03", "2029-11-22", "2029-12-25",
+    "2030-01-01", "2030-01-21", "2030-02-18", "2030-04-19", "2030-05-27", "2030-06-19", "2030-07-04", "2030-09-02", "2030-11-28", "2030-12-25",
+    "2031-01-01", "2031-01-20", "2031-02-17", "2031-04-11", "2031-05-26", "2031-06-19", "2031-07-04", "2031-09-01", "2031-11-27", "2031-12-25",
+    "2032-01-01", "2032-01-19", "2032-02-16", "2032-03-26", "2032-05-31", "2032-06-18", "2032-07-05", "2032-09-06", "2032-11-25", "2032-12-24",
+    "2033-01-17", "2033-02-21", "2033-04-15", "2033-05-30", "2033-06-20", "2033-07-04", "2033-09-05", "2033-11-24", "2033-12-26",
+    "2034-01-02", "2034-01-16", "2034-02-20", "2034-04-07", "2034-05-29", "2034-06-19", "2034-07-04", "2034-09-04", "2034-11-23", "2034-12-25",
+    "2035-01-01", "2035-01-15", "2035-02-19", "2035-03-23", "2035-05-28", "2035-06-19", "2035-07-04", "2035-09-03", "2035-11-22", "2035-12-25",
+    "2036-01-01", "2036-01-21", "2036-02-18", "2036-04-11", "2036-05-26", "2036-06-19", "2036-07-04", "2036-09-01", "2036-11-27", "2036-12-25",
+    "2037-01-01", "2037-01-19", "2037-02-16", "2037-04-03", "2037-05-25", "2037-06-19", "2037-07-03", "2037-09-07", "2037-11-26", "2037-12-25",
+    "2038-01-01", "2038-01-18", "2038-02-15", "2038-04-23", "2038-05-31", "2038-06-18", "2038-07-05", "2038-09-06", "2038-11-25", "2038-12-24",
+    "2039-01-17", "2039-02-21", "2039-04-08", "2039-05-30", "2039-06-20", "2039-07-04", "2039-09-05", "2039-11-24", "2039-12-26",
+    "2040-01-02", "2040-01-16", "2040-02-20", "2040-03-30", "2040-05-28", "2040-06-19", "2040-07-04", "2040-09-03", "2040-11-22", "2040-12-25",
+)
@@ -0,0 +1,364 @@
+"""Mean-variance and risk-parity portfolio optimisation.
+
+Covariance estimates (sample, Ledoit-Wolf shrinkage towards a scaled
+identity, EWMA) are built from the stored returns panel and cached in memory
+and in ``data/cov_cache`` keyed by a hash of the panel, so repeated runs
+and solves reuse them. Both caches keep the most recently used
+``MAX_CACHED_COVARIANCES`` entries.
+
+Constrained problems are quadratic programs solved by a dense interior point
+method in numpy; the constraint matrix is built once per optimiser and a
+frontier point only adds the target-return row. Each solve takes a few dozen
+Newton steps, so a 100-point frontier over a few dozen holdings runs in well
+under a second. Infeasible constraints raise ``ValueError``, and every
+returned portfolio is checked against its bounds and groups.
+"""
+import hashlib
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+DEFAULT_CACHE_DIR = os.path.join("data", "cov_cache")
+ESTIMATORS = ("sample", "ledoit_wolf", "ewma")
+MAX_CACHED_COVARIANCES = 32  # one per panel/estimator; older files are pruned
+CONSTRAINT_TOLERANCE = 1e-6
+
+_memory_cache = {}
+
+
+def _sample_cov(x):
+    return np.cov(x, rowvar=False, ddof=1)
+
+
+def _ledoit_wolf_cov(x):
+    """Ledoit-Wolf (2004) shrinkage of the sample covariance towards mu * I"""
+    n, p = x.shape
+    x = x - x.mean(axis=0)
+    sample = x.T @ x / n
+    mu = np.trace(sample) / p
+    delta = ((sample - mu * np.eye(p)) ** 2).sum() / p
+    # sum_k ||x_k x_k' - S||_F^2 = sum_k ||x_k||^4 - n ||S||_F^2
+    beta = ((x ** 2).sum(axis=1) ** 2).sum() - n * (sample ** 2).sum()
+    beta = min(beta / (n * n * p), delta)
+    shrinkage = beta / delta if delta > 0 else 0.0
+    return shrinkage * mu * np.eye(p) + (1 - shrinkage) * sample
+
+
+def _ewma_cov(x, halflife):
+    decay = 0.5 ** (1.0 / halflife)
+    weights = decay ** np.arange(len(x) - 1, -1, -1)
+    weights /= weights.sum()
+    centred = x - weights @ x
+    return (centred * weights[:, None]).T @ centred
+
+
+def _prune_cache(cache_dir, keep=MAX_CACHED_COVARIANCES):
+    """Delete all but the keep most recently used covariance files"""
+    files = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(".npy")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def covariance(returns, method="ledoit_wolf", halflife=63, periods=PERIODS_PER_YEAR, cache_dir=DEFAULT_CACHE_DIR):
+    """Annualised covariance of a gap-free date x ticker returns frame, cached by content"""
+    if method not in ESTIMATORS:
+        raise ValueError(f"Unknown covariance estimator: {method}")
+    x = returns.to_numpy(dtype=np.float64)
+    digest = hashlib.sha1(x.tobytes())
+    digest.update(repr((list(returns.columns), method, halflife, periods)).encode())
+    key = digest.hexdigest()[:20]
+    if key in _memory_cache:
+        _memory_cache[key] = _memory_cache.pop(key)  # most recently used last
+        return _memory_cache[key]
+
+    path = os.path.join(cache_dir, f"{key}.npy") if cache_dir else None
+    if path and os.path.exists(path):
+        cov = np.load(path)
+        os.utime(path)  # pruning keeps recently used files
+    else:
+        if method == "sample":
+            cov = _sample_cov(x)
+        elif method == "ledoit_wolf":
+            cov = _ledoit_wolf_cov(x)
+        else:
+            cov = _ewma_cov(x, halflife)
+        cov = cov * periods
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, cov)
+            _prune_cache(cache_dir)
+    frame = pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
+    _memory_cache[key] = frame
+    while len(_memory_cache) > MAX_CACHED_COVARIANCES:
+        _memory_cache.pop(next(iter(_memory_cache)))
+    return frame
+
+
+def _split_constraints(A, lower, upper):
+    """Turn l <= Ax <= u rows into equalities E x = b and inequalities G x <= h"""
+    eq = np.isfinite(lower) & (lower == upper)
+    up = np.isfinite(upper) & ~eq
+    down = np.isfinite(lower) & ~eq
+    G = np.vstack([A[up], -A[down]])
+    h = np.concatenate([upper[up], -lower[down]])
+    return A[eq], lower[eq], G, h
+
+
+def solve_qp(P, q, A, lower, upper, tol=1e-9, max_iter=100):
+    """Minimise 1/2 x'Px + q'x subject to lower <= Ax <= upper
+
+    Dense primal-dual interior point method with Mehrotra's predictor-corrector
+    step. P only needs to be positive semidefinite (P = 0 gives an LP) as long
+    as the inequality rows bound every variable, which the weight bounds do.
+    Raises ValueError if the constraints cannot all be met; if max_iter is
+    reached on a feasible point it prints a warning and returns that point.
+    """
+    E, b, G, h = _split_constraints(A, lower, upper)
+    n, me, mi = len(q), len(b), len(h)
+    x = np.zeros(n)
+    y = np.zeros(me)
+    s = np.maximum(h - G @ x, 1.0)
+    z = np.ones(mi)
+    scale = 1.0 + max(np.abs(q).max(initial=0.0), np.abs(b).max(initial=0.0), np.abs(h).max(initial=0.0))
+    kkt = np.zeros((n + me, n + me))
+    kkt[:n, n:] = E.T
+    kkt[n:, :n] = E
+    kkt[n:, n:] = -1e-12 * np.eye(me)
+
+    def newton(r_dual, r_eq, r_ineq, r_comp):
+        rhs = np.concatenate([-r_dual - G.T @ ((z * r_ineq - r_comp) / s), -r_eq])
+        step = np.linalg.solve(kkt, rhs)
+        dx, dy = step[:n], step[n:]
+        ds = -r_ineq - G @ dx
+        dz = (-r_comp - z * ds) / s
+        return dx, dy, ds, dz
+
+    def max_step(v, dv):
+        shrinking = dv < 0
+        return min(1.0, (-v[shrinking] / dv[shrinking]).min(initial=np.inf))
+
+    infeasible = "QP constraints are infeasible: no point satisfies every bound"
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            r_dual = P @ x + q + E.T @ y + G.T @ z
+            r_eq = E @ x - b
+            r_ineq = G @ x + s - h
+            gap = s @ z / mi
+            primal = max(np.abs(r_eq).max(initial=0.0), np.abs(r_ineq).max())
+            residual = max(np.abs(r_dual).max(), primal)
+            if not (np.isfinite(residual) and np.isfinite(gap)):
+                raise ValueError(infeasible)
+            if residual < tol * scale and gap < tol:
+                break
+            kkt[:n, :n] = P + G.T @ ((z / s)[:, None] * G) + 1e-12 * np.eye(n)
+            try:
+                # Predictor: pure Newton step towards the complementarity-free point
+                dx, dy, ds, dz = newton(r_dual, r_eq, r_ineq, s * z)
+                alpha = min(max_step(s, ds), max_step(z, dz))
+                centring = ((s + alpha * ds) @ (z + alpha * dz) / mi / gap) ** 3
+                # Corrector: re-centre and compensate the predictor's second-order term
+                dx, dy, ds, dz = newton(r_dual, r_eq, r_ineq, s * z + ds * dz - centring * gap)
+            except np.linalg.LinAlgError:
+                raise ValueError(infeasible) from None
+            alpha = 0.99 * min(max_step(s, ds), max_step(z, dz))
+            x, y, s, z = x + alpha * dx, y + alpha * dy, s + alpha * ds, z + alpha * dz
+        else:
+            # An infeasible problem stalls with a primal residual that never closes
+            if not primal < math.sqrt(tol) * scale:
+                raise ValueError(infeasible)
+            print(f"⚠ QP solver stopped after {max_iter} iterations (residual {residual:.2e}, gap {gap:.2e})")
+    return x
+
+
+class PortfolioOptimizer:
+    """Min-variance, max-Sharpe, target-volatility and risk-parity portfolios
+
+    bounds is one (lo, hi) pair for every ticker or {ticker: (lo, hi)}; groups
+    maps a name to (tickers, lo, hi) bounds on the group's total weight.
+    """
+
+    def __init__(self, returns, estimator="ledoit_wolf", bounds=(0.0, 1.0), groups=None,
+                 risk_free=0.0, halflife=63, periods=PERIODS_PER_YEAR, cache_dir=DEFAULT_CACHE_DIR):
+        returns = returns.dropna()
+        self.tickers = list(returns.columns)
+        self.cov = covariance(returns, estimator, halflife, periods, cache_dir)
+        self.mean = returns.mean() * periods
+        self.risk_free = risk_free
+        self._sigma = self.cov.to_numpy()
+        self._mu = self.mean.to_numpy()
+
+        n = len(self.tickers)
+        if isinstance(bounds, dict):
+            pairs = [bounds.get(t, (0.0, 1.0)) for t in self.tickers]
+        else:
+            pairs = [bounds] * n
+        self.lo = np.array([p[0] for p in pairs], dtype=float)
+        self.hi = np.array([p[1] for p in pairs], dtype=float)
+        if self.lo.sum() > 1 + 1e-12 or self.hi.sum() < 1 - 1e-12:
+            raise ValueError("Weight bounds cannot sum to 100%")
+
+        rows, lower, upper = [np.ones(n)], [1.0], [1.0]
+        rows += list(np.eye(n))
+        lower += list(self.lo)
+        upper += list(self.hi)
+        self._row_names = ["total weight", *self.tickers]
+        for name, (members, g_lo, g_hi) in (groups or {}).items():
+            unknown = set(members) - set(self.tickers)
+            if unknown:
+                raise ValueError(f"Group {name} has unknown tickers: {sorted(unknown)}")
+            rows.append(np.array([1.0 if t in members else 0.0 for t in self.tickers]))
+            lower.append(g_lo)
+            upper.append(g_hi)
+            self._row_names.append(f"group {name}")
+        self._A = np.array(rows)
+        self._lower = np.array(lower)
+        self._upper = np.array(upper)
+        self.groups = dict(groups or {})
+        if self.groups:
+            # One feasibility solve up front, so impossible groups fail here with a clear message
+            try:
+                solve_qp(np.zeros((n, n)), np.zeros(n), self._A, self._lower, self._upper)
+            except ValueError:
+                raise ValueError("Weight bounds and groups cannot all be met") from None
+
+    def violations(self, weights, tol=CONSTRAINT_TOLERANCE):
+        """Names of the bound and group constraints weights break (beyond tol)"""
+        w = pd.Series(weights).reindex(self.tickers).fillna(0.0).to_numpy()
+        activity = self._A @ w
+        broken = (activity < self._lower - tol) | (activity > self._upper + tol) | ~np.isfinite(activity)
+        return [name for name, bad in zip(self._row_names, broken) if bad]
+
+    def _weights(self, x, what="Optimised"):
+        """Solver output as weights, checked against every bound and group after renormalising"""
+        x = np.clip(x, self.lo, self.hi)  # interior-point round-off only
+        weights = pd.Series(x / x.sum(), index=self.tickers)
+        broken = self.violations(weights)
+        if broken:
+            raise ValueError(f"{what} weights break constraints: {', '.join(broken)}")
+        return weights
+
+    def _solve(self, P, q, target_return=None):
+        A, lower, upper = self._A, self._lower, self._upper
+        if target_return is not None:
+            A = np.vstack([A, self._mu])
+            lower = np.append(lower, target_return)
+            upper = np.append(upper, target_return)
+        return self._weights(solve_qp(P, q, A, lower, upper))
+
+    def stats(self, weights):
+        """Annualised expected return, volatility and Sharpe ratio of weights"""
+        w = pd.Series(weights).reindex(self.tickers).fillna(0.0).to_numpy()
+        ret = float(w @ self._mu)
+        vol = float(math.sqrt(max(w @ self._sigma @ w, 0.0)))
+        return {"return": ret, "volatility": vol, "sharpe": (ret - self.risk_free) / vol if vol else math.nan}
+
+    def min_variance(self):
+        return self._solve(self._sigma, np.zeros(len(self.tickers)))
+
+    def mean_variance(self, risk_aversion):
+        """Maximise mu'w - risk_aversion / 2 * w'Sigma w"""
+        return self._solve(risk_aversion * self._sigma, -self._mu)
+
+    def max_return(self):
+        """Highest expected return allowed by the constraints (a linear program)"""
+        n = len(self.tickers)
+        return self._solve(np.zeros((n, n)), -self._mu)
+
+    def max_sharpe(self):
+        """Tangency portfolio, from one QP in the homogenised variables y = kappa * w
+
+        Minimising y'Sigma y subject to (mu - rf)'y = 1 and every constraint
+        row scaled by kappa >= 0 maximises the Sharpe ratio exactly.
+        """
+        excess = self._mu - self.risk_free
+        if excess.max() <= 0:
+            raise ValueError("No asset has an expected return above the risk-free rate")
+        n = len(self.tickers)
+        P = np.zeros((n + 1, n + 1))
+        P[:n, :n] = self._sigma
+        rows, lower, upper = [np.append(excess, 0.0)], [1.0], [1.0]
+        for row, lo, hi in zip(self._A, self._lower, self._upper):
+            if lo == hi:
+                rows.append(np.append(row, -lo))
+                lower.append(0.0)
+                upper.append(0.0)
+                continue
+            if np.isfinite(hi):
+                rows.append(np.append(row, -hi))
+                lower.append(-np.inf)
+                upper.append(0.0)
+            if np.isfinite(lo):
+                rows.append(np.append(row, -lo))
+                lower.append(0.0)
+                upper.append(np.inf)
+        rows.append(np.append(np.zeros(n), 1.0))
+        lower.append(0.0)
+        upper.append(np.inf)
+        y = solve_qp(P, np.zeros(n + 1), np.array(rows), np.array(lower), np.array(upper))
+        return self._weights(y[:n] / y[n], "Max-Sharpe")
+
+    def target_volatility(self, target, tol=1e-6):
+        """Highest-return portfolio whose volatility does not exceed target"""
+        minimum = self.min_variance()
+        if self.stats(minimum)["volatility"] >= target:
+            raise ValueError(f"Target volatility {target:.2%} is below the minimum-variance portfolio")
+        top = self.max_return()
+        if self.stats(top)["volatility"] <= target:
+            return top
+        a, b = self.stats(minimum)["return"], self.stats(top)["return"]
+        zero = np.zeros(len(self.tickers))
+        while b - a > tol:
+            mid = (a + b) / 2
+            if self.stats(self._solve(self._sigma, zero, mid))["volatility"] > target:
+                b = mid
+            else:
+                a = mid
+        return self._solve(self._sigma, zero, a)
+
+    def risk_parity(self, budgets=None, tol=1e-10, max_iter=10000):
+        """Equal (or budgeted) risk contributions, long only
+
+        Risk parity has one solution per budget, so bounds and groups cannot
+        move it; a ValueError names any of them that solution breaks.
+        """
+        n = len(self.tickers)
+        b = np.full(n, 1.0 / n) if budgets is None else pd.Series(budgets).reindex(self.tickers).to_numpy()
+        sigma = self._sigma
+        y = 1.0 / np.sqrt(np.diag(sigma))
+        # Cyclical coordinate descent on 1/2 y'Sigma y - sum b_i log y_i
+        for _ in range(max_iter):
+            previous = y.copy()
+            for i in range(n):
+                c = sigma[i] @ y - sigma[i, i] * y[i]
+                y[i] = (-c + math.sqrt(c * c + 4 * sigma[i, i] * b[i])) / (2 * sigma[i, i])
+            if np.abs(y - previous).max() < tol:
+                break
+        else:
+            print(f"⚠ Risk parity stopped after {max_iter} sweeps without converging")
+        weights = pd.Series(y / y.sum(), index=self.tickers)
+        broken = self.violations(weights)
+        if broken:
+            raise ValueError(f"Risk parity weights break constraints: {', '.join(broken)}; "
+                             "relax them or adjust budgets")
+        return weights
+
+    def risk_contributions(self, weights):
+        w = pd.Series(weights).reindex(self.tickers).fillna(0.0).to_numpy()
+        contrib = w * (self._sigma @ w)
+        return pd.Series(contrib / contrib.sum(), index=self.tickers)
+
+    def efficient_frontier(self, points=100):
+        """Frontier portfolios for evenly spaced target returns: (stats frame, weights frame)"""
+        low = self.stats(self.min_variance())["return"]
+        high = self.stats(self.max_return())["return"]
+        zero = np.zeros(len(self.tickers))
+        weights = [self._solve(self._sigma, zero, r) for r in np.linspace(low, high, points)]
+        table = pd.DataFrame([self.stats(w) for w in weights])
+        return table, pd.DataFrame(weights).reset_index(drop=True)
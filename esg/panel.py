@@ -0,0 +1,168 @@
+"""Compact date x ticker price panel backed by a memory-mapped array.
+
+A ``PricePanel`` is one dense float32/float64 array (rows are dates, columns
+are tickers) plus a ``datetime64[D]`` date index and a ticker list. Saved
+panels are a directory holding ``values.npy``, ``dates.npy`` and
+``tickers.json``; ``PricePanel.open`` maps ``values.npy`` read-only, so a
+universe of thousands of tickers is paged in on demand instead of being
+loaded into a DataFrame.
+
+Row ranges (``between``) and gap-free rows (``dropna`` when the gaps are at
+the start, as with late listings) are views of the same buffer. Valuation
+(``value``) walks the array in row chunks sized to a memory budget and
+accumulates in float64, so only the selected columns of one chunk are ever
+copied. ``to_frame`` builds a DataFrame only when a caller asks for one.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_MB = 64
+
+
+class PricePanel:
+    """Dense date x ticker price array with date and ticker indexes"""
+
+    def __init__(self, values, dates, tickers):
+        self.values = values
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tickers = list(tickers)
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        if values.shape != (len(self.dates), len(self.tickers)):
+            raise ValueError(f"Panel values {values.shape} do not match "
+                             f"{len(self.dates)} dates x {len(self.tickers)} tickers")
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.dates, name="Date")
+
+    @classmethod
+    def from_frame(cls, frame, dtype=np.float64):
+        return cls(frame.to_numpy(dtype=dtype), frame.index.values.astype("datetime64[D]"), frame.columns)
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Map a saved panel; mode "r" is read-only, "r+" writes back to disk"""
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode=mode)
+        dates = np.load(os.path.join(path, "dates.npy"))
+        with open(os.path.join(path, "tickers.json"), encoding="utf-8") as f:
+            tickers = json.load(f)
+        return cls(values, dates, tickers)
+
+    @classmethod
+    def empty(cls, dates, tickers, dtype=np.float64, path=None):
+        """All-NaN panel, memory-mapped to a new directory at path if given"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        tickers = list(tickers)
+        shape = (len(dates), len(tickers))
+        if path is None:
+            return cls(np.full(shape, np.nan, dtype=dtype), dates, tickers)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        values = np.lib.format.open_memmap(os.path.join(path, "values.npy"), mode="w+", dtype=dtype, shape=shape)
+        values[:] = np.nan
+        np.save(os.path.join(path, "dates.npy"), dates)
+        with open(os.path.join(path, "tickers.json"), "w", encoding="utf-8") as f:
+            json.dump(tickers, f)
+        return cls(values, dates, tickers)
+
+    def save(self, path):
+        """Write the panel to directory path, replacing any previous panel there"""
+        tmp = f"{path}.tmp"
+        out = PricePanel.empty(self.dates, self.tickers, self.values.dtype, path=tmp)
+        for lo, hi in self.row_chunks():
+            out.values[lo:hi] = self.values[lo:hi]
+        out.values.flush()
+        del out
+        replace_directory(tmp, path)
+        return path
+
+    def row_chunks(self, columns=None, memory_mb=DEFAULT_CHUNK_MB):
+        """(lo, hi) row ranges whose selected columns fit in memory_mb as float64"""
+        width = len(self.tickers) if columns is None else len(columns)
+        step = max(1, int(memory_mb * 2 ** 20 // (max(width, 1) * 8)))
+        return [(lo, min(lo + step, len(self))) for lo in range(0, len(self), step)]
+
+    def positions(self, tickers):
+        """Column positions of tickers, raising KeyError for unknown ones"""
+        return np.array([self.ticker_index[t] for t in tickers], dtype=np.intp)
+
+    def column(self, ticker):
+        """One ticker's prices as a (strided) view"""
+        return self.values[:, self.ticker_index[ticker]]
+
+    def row(self, position, tickers=None):
+        """{ticker: price} for one date (by row position, negatives count from the end)"""
+        tickers = self.tickers if tickers is None else tickers
+        values = self.values[position]
+        return {t: float(values[self.ticker_index[t]]) for t in tickers}
+
+    def between(self, start=None, end=None):
+        """Rows with start <= date < end, as a view"""
+        lo = 0 if start is None else self.dates.searchsorted(np.datetime64(pd.Timestamp(start).date()))
+        hi = len(self) if end is None else self.dates.searchsorted(np.datetime64(pd.Timestamp(end).date()))
+        return PricePanel(self.values[lo:hi], self.dates[lo:hi], self.tickers)
+
+    def select(self, tickers):
+        """Panel of the given tickers (a view when they are a contiguous run of columns)"""
+        cols = self.positions(tickers)
+        if len(cols) and np.array_equal(cols, np.arange(cols[0], cols[0] + len(cols))):
+            return PricePanel(self.values[:, cols[0]:cols[0] + len(cols)], self.dates, tickers)
+        return PricePanel(self.values[:, cols], self.dates, tickers)
+
+    def complete_rows(self, tickers=None):
+        """Boolean mask of dates where every ticker (default all) has a price"""
+        cols = None if tickers is None else self.positions(tickers)
+        mask = np.empty(len(self), dtype=bool)
+        for lo, hi in self.row_chunks(cols):
+            block = self.values[lo:hi] if cols is None else self.values[lo:hi][:, cols]
+            mask[lo:hi] = ~np.isnan(block).any(axis=1)
+        return mask
+
+    def dropna(self, tickers=None):
+        """Rows where every ticker has a price, restricted to tickers if given
+
+        A view when the complete rows are one contiguous run (gaps only at the
+        start or end); otherwise the complete rows are copied.
+        """
+        panel = self if tickers is None else self.select(tickers)
+        keep = np.flatnonzero(panel.complete_rows())
+        if len(keep) == 0 or keep[-1] - keep[0] + 1 == len(keep):
+            lo, hi = (keep[0], keep[-1] + 1) if len(keep) else (0, 0)
+            return PricePanel(panel.values[lo:hi], panel.dates[lo:hi], panel.tickers)
+        return PricePanel(panel.values[keep], panel.dates[keep], panel.tickers)
+
+    def value(self, quantities, memory_mb=DEFAULT_CHUNK_MB):
+        """Daily value of holding {ticker: shares}, summed in float64 chunk by chunk"""
+        cols = self.positions(quantities)
+        shares = np.fromiter(quantities.values(), dtype=np.float64, count=len(cols))
+        out = np.empty(len(self))
+        for lo, hi in self.row_chunks(cols, memory_mb):
+            out[lo:hi] = self.values[lo:hi][:, cols].astype(np.float64, copy=False) @ shares
+        return out
+
+    def to_frame(self, tickers=None, copy=True):
+        """Date x ticker DataFrame of the selected columns; copy=False wraps the (read-only) buffer"""
+        panel = self if tickers is None else self.select(tickers)
+        values = np.array(panel.values) if copy else np.asarray(panel.values)
+        return pd.DataFrame(values, index=panel.index, columns=pd.Index(panel.tickers, name="Ticker"), copy=False)
+
+
+def replace_directory(tmp, path):
+    """Move a fully written panel directory into place so readers never see half of one"""
+    old = f"{path}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
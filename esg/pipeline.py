@@ -0,0 +1,266 @@
+"""Named stages with declared inputs, run as a DAG with memoized results.
+
+A ``Stage`` is a function whose keyword arguments are the results of the
+stages it lists as inputs. ``Pipeline.run`` starts every stage as soon as its
+inputs are ready, so independent branches (news, metrics, charts) overlap on
+a thread pool.
+
+Memoized stages are keyed by a content hash of their input results, a
+version string and the code the stage runs: the bytecode and constants
+(which include template strings) of the stage function, of any helpers
+listed in ``uses`` and of the script-level functions it calls by name, plus
+the source of every ``esg`` module those reach, followed through the
+modules' own ``esg`` imports. Editing ``esg/simulation.py`` therefore re-runs
+the projection stage, while editing the script elsewhere does not. Each stage
+keeps its last result in ``data/artifacts/<pipeline>/<stage>.pkl`` with a
+digest of each declared output file. When the key matches and every output
+file still has the digest it was written with, the stored result is reused
+without calling the function; an output overwritten by another script makes
+the stage run again. Editing the dashboard template therefore
+re-runs only the HTML stage. Source stages that read the network or a live
+cache are declared with ``memoize=False`` and always run, but their results
+are still hashed so downstream stages are skipped when nothing changed.
+"""
+import ast
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import types
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from esg.instrument import recorder
+from esg.manifest import fingerprint, force_requested
+
+DEFAULT_ARTIFACT_DIR = os.path.join("data", "artifacts")
+DEFAULT_WORKERS = 4
+
+
+def _code_parts(code):
+    """Bytecode and constants of a function, recursing into nested code objects"""
+    parts = [code.co_code, code.co_names]
+    for const in code.co_consts:
+        parts.append(_code_parts(const) if hasattr(const, "co_code") else repr(const))
+    return parts
+
+
+def _code_names(code):
+    """Global and attribute names used by code and the code objects nested in it"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _code_names(const)
+    return names
+
+
+def _is_esg(name):
+    return name == "esg" or name.startswith("esg.")
+
+
+def _esg_module(value):
+    """Name of the esg module that defines value (or is value), else None"""
+    name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+    if isinstance(name, str) and _is_esg(name):
+        return name
+    return None
+
+
+_module_sources = {}
+
+
+def _module_source(name):
+    """(sha1 of the source, esg modules it imports, {imported name: esg module}) for a module, cached"""
+    if name not in _module_sources:
+        try:
+            with open(inspect.getsourcefile(sys.modules[name]), "rb") as f:
+                source = f.read()
+        except (KeyError, TypeError, OSError):  # no source file (an interactive session)
+            _module_sources[name] = (None, set(), {})
+            return _module_sources[name]
+        imports, names = set(), {}
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.Import):
+                imports |= {alias.name for alias in node.names if _is_esg(alias.name)}
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level and _is_esg(node.module):
+                imports.add(node.module)
+                names.update({alias.asname or alias.name: node.module for alias in node.names})
+        imports = {m for m in imports if m in sys.modules}
+        _module_sources[name] = (hashlib.sha1(source).hexdigest(), imports, names)
+    return _module_sources[name]
+
+
+def code_dependencies(funcs):
+    """Code of funcs and the script functions they call, and sources of the esg modules they reach"""
+    code, modules, seen = [], set(), set()
+    pending = list(funcs)
+    while pending:
+        func = pending.pop()
+        func = getattr(func, "__func__", func)
+        if id(func) in seen:
+            continue
+        seen.add(id(func))
+        code.append((func.__qualname__, _code_parts(func.__code__)))
+        if _esg_module(func):
+            modules.add(func.__module__)
+        # Constants imported from esg (SESSION_CLOSE) only show up in the import statements
+        imported = {} if _esg_module(func) else _module_source(func.__module__)[2]
+        for name in _code_names(func.__code__):
+            if name in sys.modules and _esg_module(sys.modules[name]):
+                modules.add(name)  # a function-level import of esg.<module>
+            if name in imported and imported[name] in sys.modules:
+                modules.add(imported[name])
+            if name not in func.__globals__:
+                continue
+            value = func.__globals__[name]
+            if isinstance(value, types.FunctionType) and value.__module__ == func.__module__ and not _esg_module(value):
+                pending.append(value)
+            elif _esg_module(value):
+                modules.add(_esg_module(value))
+
+    sources, pending = {}, list(modules)
+    while pending:
+        name = pending.pop()
+        if name not in sources:
+            sources[name], imports, _ = _module_source(name)
+            pending.extend(imports)
+    return code, sorted(sources.items())
+
+
+def _file_digest(path):
+    """sha1 of a file's bytes, or None if it does not exist"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+class Stage:
+    """One pipeline step: func(**{input: result}) -> result"""
+
+    def __init__(self, name, func, inputs=(), outputs=(), version="1", memoize=True, uses=()):
+        self.name = name
+        self.func = func
+        self.uses = tuple(uses)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.version = version
+        self.memoize = memoize
+
+    def key(self, input_digests):
+        code, sources = code_dependencies((self.func, *self.uses))
+        return fingerprint(self.name, self.version, code, sources, [input_digests[name] for name in self.inputs])
+
+
+class Pipeline:
+    """Run stages in dependency order, concurrently where the graph allows"""
+
+    def __init__(self, stages, name="pipeline", artifact_dir=DEFAULT_ARTIFACT_DIR, workers=DEFAULT_WORKERS, force=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.name = name
+        # Scripts reuse stage names ("config", "metrics"), so each pipeline keeps its own artifacts
+        self.artifact_dir = os.path.join(artifact_dir, name)
+        self.workers = workers
+        self.force = force_requested() if force is None else force
+        self.ran = []
+        self.reused = []
+        self.timings = {}
+        for stage in stages:
+            missing = set(stage.inputs) - set(self.stages)
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(missing)}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "active":
+                raise ValueError(f"Pipeline has a cycle: {' -> '.join(path + [name])}")
+            state[name] = "active"
+            for upstream in self.stages[name].inputs:
+                visit(upstream, path + [name])
+            state[name] = "done"
+
+        for name in self.stages:
+            visit(name, [])
+
+    def _artifact_path(self, name):
+        return os.path.join(self.artifact_dir, f"{name}.pkl")
+
+    def _load(self, stage, key):
+        """Stored (result, digest) if the stage's last run had this key, else None"""
+        if self.force or not stage.memoize:
+            return None
+        try:
+            with open(self._artifact_path(stage.name), "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if saved.get("key") != key:
+            return None
+        outputs = saved.get("outputs", {})
+        if any(outputs.get(path) is None or _file_digest(path) != outputs[path] for path in stage.outputs):
+            return None
+        return saved["result"], saved["digest"]
+
+    def _store(self, stage, key, result, digest):
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        path = self._artifact_path(stage.name)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"key": key, "digest": digest, "result": result,
+                         "outputs": {path: _file_digest(path) for path in stage.outputs}},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _execute(self, stage, results, digests):
+        with recorder.stage(stage.name) as measured:
+            key = stage.key(digests)
+            cached = self._load(stage, key)
+            if cached is not None:
+                result, digest = cached
+                measured["reused"] = True
+            else:
+                result = stage.func(**{name: results[name] for name in stage.inputs})
+                digest = fingerprint(result)
+                if stage.memoize:
+                    self._store(stage, key, result, digest)
+        return result, digest, measured["reused"], measured["wall"]
+
+    def run(self, targets=None):
+        """Run the targets (default: every stage) and their upstream stages; returns {name: result}"""
+        needed = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].inputs)
+
+        results, digests, running = {}, {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while len(results) < len(needed):
+                for name in needed:
+                    stage = self.stages[name]
+                    ready = all(upstream in results for upstream in stage.inputs)
+                    if name not in results and name not in running.values() and ready:
+                        running[pool.submit(self._execute, stage, results, digests)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, digest, reused, seconds = future.result()
+                    results[name], digests[name] = result, digest
+                    self.timings[name] = seconds
+                    (self.reused if reused else self.ran).append(name)
+        return results
+
+    def summary(self):
+        ran = ", ".join(f"{name} {self.timings[name]:.2f}s" for name in self.ran) or "nothing"
+        return f"✓ Pipeline ran {ran}; reused {', '.join(self.reused) or 'nothing'}"
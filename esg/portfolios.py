@@ -0,0 +1,83 @@
+"""Evaluate many candidate weightings against one price panel at once.
+
+A P x N weights matrix is turned into share quantities (buy-and-hold, as in
+``main.py``) or applied to daily returns (constant mix, as in
+``update_data.py``), and all P value paths come out of one matrix multiply.
+Weight rows are processed in chunks sized to a memory budget, so thousands of
+portfolios never need a full T x P intermediate unless values are requested.
+"""
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+DEFAULT_MEMORY_MB = 256
+METRIC_COLUMNS = ["total_return", "cagr", "volatility", "sharpe", "max_drawdown"]
+
+
+def _weights_matrix(weights, tickers):
+    """Align a P x N weights frame (or dict for one portfolio) to tickers and normalise rows"""
+    if isinstance(weights, dict):
+        weights = pd.DataFrame([weights])
+    weights = weights.reindex(columns=tickers).fillna(0.0)
+    totals = weights.sum(axis=1)
+    if (totals <= 0).any():
+        raise ValueError("Every portfolio needs a positive total weight")
+    return weights.div(totals, axis=0)
+
+
+def _chunk_rows(n_dates, memory_mb):
+    """Portfolios per chunk so values, returns and drawdowns fit in memory_mb"""
+    per_portfolio = n_dates * 8 * 3
+    return max(1, int(memory_mb * 1024 * 1024 // per_portfolio))
+
+
+def value_paths(prices, weights, initial=100000.0, mode="buy_and_hold"):
+    """T x p value paths for a block of weight rows (ndarray, no index)"""
+    if mode == "buy_and_hold":
+        quantities = weights * initial / prices[0]
+        return prices @ quantities.T
+    if mode == "constant_mix":
+        growth = np.cumprod(1 + (prices[1:] / prices[:-1] - 1) @ weights.T, axis=0)
+        return initial * np.vstack([np.ones((1, weights.shape[0])), growth])
+    raise ValueError(f"Unknown valuation mode: {mode}")
+
+
+def path_metrics(values, periods=PERIODS_PER_YEAR):
+    """Metric columns for each value path (column) of a T x p array"""
+    returns = values[1:] / values[:-1] - 1
+    total = values[-1] / values[0]
+    cagr = total ** (periods / len(returns)) - 1
+    volatility = returns.std(axis=0, ddof=1) * np.sqrt(periods)
+    drawdown = values / np.maximum.accumulate(values, axis=0) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = cagr / volatility
+    return np.column_stack([total - 1, cagr, volatility, sharpe, drawdown.min(axis=0)])
+
+
+def evaluate_portfolios(prices, weights, initial=100000.0, mode="buy_and_hold",
+                        periods=PERIODS_PER_YEAR, memory_mb=DEFAULT_MEMORY_MB, return_values=False):
+    """Value and score every weights row against a gap-free date x ticker price frame
+
+    Returns a P-row metrics frame, or (metrics, T x P values frame) when
+    return_values is set.
+    """
+    if prices.isna().any().any():
+        raise ValueError("Price panel has gaps; drop or fill them before evaluating")
+    w = _weights_matrix(weights, list(prices.columns))
+    panel = prices.to_numpy(dtype=np.float64)
+    chunk = _chunk_rows(len(panel), memory_mb)
+
+    metrics = np.empty((len(w), len(METRIC_COLUMNS)))
+    values = np.empty((len(panel), len(w))) if return_values else None
+    w_arr = w.to_numpy()
+    for lo in range(0, len(w_arr), chunk):
+        hi = lo + chunk
+        paths = value_paths(panel, w_arr[lo:hi], initial, mode)
+        metrics[lo:hi] = path_metrics(paths, periods)
+        if return_values:
+            values[:, lo:hi] = paths
+
+    table = pd.DataFrame(metrics, index=w.index, columns=METRIC_COLUMNS)
+    if return_values:
+        return table, pd.DataFrame(values, index=prices.index, columns=w.index)
+    return table
@@ -0,0 +1,237 @@
+"""On-disk price history cache shared by the backtest and the daily refresh.
+
+Bars are stored in SQLite keyed by (ticker, date, field). Each run only asks
+the market-data provider for the date ranges a ticker is missing, so a daily
+refresh tops up roughly one bar per symbol instead of re-downloading years of
+history.
+
+``PriceStore.panel`` streams the same rows into a ``PricePanel`` (optionally
+a memory-mapped file) without building a DataFrame.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from esg.panel import PricePanel, replace_directory
+from esg.providers import get_provider
+from esg.trading_calendar import default_calendar
+
+DEFAULT_DB_PATH = os.getenv("ESG_PRICE_DB", os.path.join("data", "prices.sqlite"))
+FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+# Adjusted closes are re-based after dividends and splits; if the overlapping
+# bar of a top-up moved by more than this we re-pull the ticker's full history.
+ADJ_TOLERANCE = 1e-6
+FETCH_ROWS = 100000  # rows pulled from SQLite per batch when filling a panel
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    field  TEXT NOT NULL,
+    value  REAL,
+    PRIMARY KEY (ticker, date, field)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker TEXT PRIMARY KEY,
+    start  TEXT NOT NULL,
+    end    TEXT NOT NULL
+);
+"""
+
+
+def _day(value):
+    """Normalise a date-like value to a 'YYYY-MM-DD' string"""
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _default_end():
+    """Exclusive end date covering the last completed session
+
+    The day after that session, so runs on weekends, holidays or before the
+    close ask for nothing new instead of an empty range.
+    """
+    return (default_calendar().last_completed_session() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _to_long(raw, tickers):
+    """Flatten a provider history frame into (ticker, date, field, value) rows"""
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=["ticker", "date", "field", "value"])
+    frame = raw.copy()
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame.columns = pd.MultiIndex.from_product([frame.columns, tickers[:1]])
+    frame.index = pd.to_datetime(frame.index).strftime("%Y-%m-%d")
+    frame.index.name = "date"
+    frame.columns.names = ["field", "ticker"]
+    long = frame.stack(["field", "ticker"], future_stack=True).dropna()
+    long = long.rename("value").reset_index()
+    long = long[long["field"].isin(FIELDS)]
+    return long[["ticker", "date", "field", "value"]]
+
+
+class PriceStore:
+    """SQLite-backed store of daily bars with incremental top-up downloads"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, provider=None):
+        self.path = path
+        self.provider = provider or get_provider()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def coverage(self):
+        """Return {ticker: (start, end)} of the date ranges already fetched"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT ticker, start, end FROM coverage").fetchall()
+        return {t: (s, e) for t, s, e in rows}
+
+    def last_dates(self, tickers):
+        """Return {ticker: last stored bar date} for tickers with any data"""
+        marks = ",".join("?" * len(tickers))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT ticker, MAX(date) FROM prices WHERE ticker IN ({marks}) GROUP BY ticker",
+                list(tickers),
+            ).fetchall()
+        return dict(rows)
+
+    def missing_ranges(self, tickers, start, end=None):
+        """Group tickers by the [start, end) range each still needs fetching"""
+        start, end = _day(start), _day(end or _default_end())
+        covered = self.coverage()
+        last = self.last_dates(tickers)
+        plan = {}
+        for ticker in dict.fromkeys(tickers):
+            if ticker not in covered:
+                plan.setdefault((start, end), []).append(ticker)
+                continue
+            cov_start, cov_end = covered[ticker]
+            if start < cov_start:
+                plan.setdefault((start, cov_start), []).append(ticker)
+            if end > cov_end:
+                # Re-request the last stored bar so adjusted closes can be checked
+                top_from = min(last.get(ticker, cov_end), cov_end)
+                plan.setdefault((top_from, end), []).append(ticker)
+        return plan
+
+    def write(self, raw, tickers, start, end):
+        """Merge a provider history frame into the store and extend coverage"""
+        long = _to_long(raw, list(tickers))
+        if long.empty:
+            return set()
+        stale = self._stale_tickers(long)
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, date, field, value) VALUES (?, ?, ?, ?)",
+                long.itertuples(index=False, name=None),
+            )
+            for ticker in long["ticker"].unique():
+                conn.execute(
+                    """
+                    INSERT INTO coverage (ticker, start, end) VALUES (?, ?, ?)
+                    ON CONFLICT(ticker) DO UPDATE SET
+                        start = MIN(start, excluded.start),
+                        end = MAX(end, excluded.end)
+                    """,
+                    (ticker, start, end),
+                )
+        return stale
+
+    def _stale_tickers(self, long):
+        """Tickers whose stored Adj Close disagrees with freshly downloaded bars"""
+        adj = long[long["field"] == "Adj Close"]
+        if adj.empty:
+            return set()
+        with closing(self._connect()) as conn:
+            stored = pd.read_sql_query(
+                "SELECT ticker, date, value AS stored FROM prices WHERE field = 'Adj Close' "
+                f"AND date IN ({','.join('?' * adj['date'].nunique())})",
+                conn,
+                params=list(adj["date"].unique()),
+            )
+        merged = adj.merge(stored, on=["ticker", "date"])
+        drift = (merged["value"] - merged["stored"]).abs() > ADJ_TOLERANCE * merged["stored"].abs()
+        return set(merged.loc[drift, "ticker"])
+
+    def drop(self, tickers):
+        """Forget all bars and coverage for the given tickers"""
+        tickers = list(tickers)
+        marks = ",".join("?" * len(tickers))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"DELETE FROM prices WHERE ticker IN ({marks})", tickers)
+            conn.execute(f"DELETE FROM coverage WHERE ticker IN ({marks})", tickers)
+
+    def update(self, tickers, start, end=None):
+        """Download only the missing ranges for tickers and merge them in"""
+        stale = set()
+        for (range_start, range_end), group in self.missing_ranges(tickers, start, end).items():
+            raw = self.provider.history(group, start=range_start, end=range_end)
+            stale |= self.write(raw, group, range_start, range_end)
+        if stale:
+            print(f"⚠ Adjusted history changed for {', '.join(sorted(stale))}, re-downloading")
+            self.drop(stale)
+            self.update(sorted(stale), start, end)
+
+    def read(self, tickers, start, end=None, field="Adj Close"):
+        """Return a date x ticker frame of one field from the store"""
+        tickers = list(dict.fromkeys(tickers))
+        marks = ",".join("?" * len(tickers))
+        query = (
+            "SELECT date, ticker, value FROM prices "
+            f"WHERE field = ? AND ticker IN ({marks}) AND date >= ? AND date < ?"
+        )
+        params = [field, *tickers, _day(start), _day(end or _default_end())]
+        with closing(self._connect()) as conn:
+            long = pd.read_sql_query(query, conn, params=params)
+        wide = long.pivot(index="date", columns="ticker", values="value")
+        wide.index = pd.DatetimeIndex(wide.index, name="Date")
+        wide.columns.name = "Ticker"
+        return wide.reindex(columns=tickers).sort_index()
+
+    def panel(self, tickers, start, end=None, field="Adj Close", dtype=np.float64, path=None):
+        """Return one field as a PricePanel, streamed into a memory-mapped directory at path if given"""
+        tickers = list(dict.fromkeys(tickers))
+        marks = ",".join("?" * len(tickers))
+        where = f"WHERE field = ? AND ticker IN ({marks}) AND date >= ? AND date < ?"
+        params = [field, *tickers, _day(start), _day(end or _default_end())]
+        columns = {t: i for i, t in enumerate(tickers)}
+        with closing(self._connect()) as conn:
+            days = conn.execute(f"SELECT DISTINCT date FROM prices {where} ORDER BY date", params).fetchall()
+            days = np.array([d for (d,) in days], dtype="datetime64[D]")
+            panel = PricePanel.empty(days, tickers, dtype, path=f"{path}.tmp" if path else None)
+            cursor = conn.execute(f"SELECT date, ticker, value FROM prices {where}", params)
+            while batch := cursor.fetchmany(FETCH_ROWS):
+                dates, names, prices = zip(*batch)
+                rows = days.searchsorted(np.array(dates, dtype="datetime64[D]"))
+                cols = np.fromiter((columns[t] for t in names), dtype=np.intp, count=len(names))
+                panel.values[rows, cols] = prices
+        if path:
+            panel.values.flush()
+            del panel
+            replace_directory(f"{path}.tmp", path)
+            panel = PricePanel.open(path)
+        return panel
+
+
+def load_prices(tickers, start, end=None, field="Adj Close", store=None):
+    """Top up the local cache for tickers and return one price field"""
+    store = store or PriceStore()
+    store.update(tickers, start, end)
+    return store.read(tickers, start, end, field=field)
+
+
+def load_panel(tickers, start, end=None, field="Adj Close", store=None, dtype=np.float64, path=None):
+    """Top up the local cache for tickers and return one price field as a PricePanel"""
+    store = store or PriceStore()
+    store.update(tickers, start, end)
+    return store.panel(tickers, start, end, field=field, dtype=dtype, path=path)
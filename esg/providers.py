@@ -0,0 +1,242 @@
+"""Market-data providers used for every price, metadata and news lookup.
+
+``YFinanceProvider`` talks to yfinance and NewsAPI. ``RecordingProvider``
+wraps it and saves every response as a fixture, and ``ReplayProvider`` serves
+those fixtures back so the whole pipeline can run offline and reproducibly.
+
+Pick one with the ``ESG_PROVIDER`` environment variable (``live``, ``record``
+or ``replay``); fixtures live under ``ESG_FIXTURES`` (default ``fixtures/``).
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from esg.instrument import payload_size, recorder
+
+NEWSAPI_URL = os.getenv("ESG_NEWSAPI_URL", "https://newsapi.org/v2/everything")
+DEFAULT_FIXTURE_DIR = "fixtures"
+HISTORY_FIELDS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+
+
+def _history_frame(per_ticker):
+    """Assemble {ticker: OHLCV frame} into yf.download's (field, ticker) layout"""
+    if not per_ticker:
+        columns = pd.MultiIndex.from_product([HISTORY_FIELDS, []], names=["Price", "Ticker"])
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="Date"))
+    frame = pd.concat(per_ticker, axis=1, names=["Ticker", "Price"])
+    frame = frame.swaplevel(axis=1).sort_index(axis=1)
+    frame.index.name = "Date"
+    return frame
+
+
+def _split_history(raw, tickers):
+    """Inverse of _history_frame: {ticker: OHLCV frame} from a yf.download frame"""
+    if raw is None or raw.empty:
+        return {}
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {tickers[0]: raw}
+    return {t: raw.xs(t, axis=1, level=1).dropna(how="all") for t in raw.columns.get_level_values(1).unique()}
+
+
+def _newsapi_key(params):
+    """Stable fixture name for a NewsAPI query, ignoring the key and date window"""
+    stable = {k: v for k, v in params.items() if k not in ("apiKey", "from", "to")}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class MarketDataProvider:
+    """Interface for price history, company metadata and news lookups"""
+
+    def history(self, tickers, start=None, end=None, period=None):
+        """Daily bars in yf.download(auto_adjust=False) layout"""
+        raise NotImplementedError
+
+    def info(self, ticker):
+        """Company metadata dict, as yf.Ticker(t).info"""
+        raise NotImplementedError
+
+    def news(self, ticker):
+        """Yahoo Finance news items, as yf.Ticker(t).news"""
+        raise NotImplementedError
+
+    def newsapi(self, params):
+        """Decoded JSON response of a NewsAPI /v2/everything query"""
+        raise NotImplementedError
+
+    def newsapi_many(self, param_list):
+        """Responses for several NewsAPI queries, in input order"""
+        return [self.newsapi(params) for params in param_list]
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live provider backed by yfinance and NewsAPI"""
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def history(self, tickers, start=None, end=None, period=None):
+        import yfinance as yf
+
+        if period:
+            return yf.download(list(tickers), period=period, auto_adjust=False, progress=False)
+        return yf.download(list(tickers), start=start, end=end, auto_adjust=False, progress=False)
+
+    def info(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).info
+
+    def news(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).news
+
+    def newsapi(self, params):
+        import requests
+
+        return requests.get(NEWSAPI_URL, params=params, timeout=self.timeout).json()
+
+    def newsapi_many(self, param_list):
+        from esg.news import AsyncNewsClient
+
+        return AsyncNewsClient(request_timeout=self.timeout).run(param_list)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Offline provider serving fixtures captured by RecordingProvider"""
+
+    def __init__(self, root=DEFAULT_FIXTURE_DIR):
+        self.root = root
+
+    def _path(self, kind, name, ext):
+        return os.path.join(self.root, kind, f"{name}.{ext}")
+
+    def _load_json(self, kind, name, default):
+        path = self._path(kind, name, "json")
+        if not os.path.exists(path):
+            print(f"⚠ No {kind} fixture for {name}")
+            return default
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def history(self, tickers, start=None, end=None, period=None):
+        frames = {}
+        for ticker in tickers:
+            path = self._path("history", ticker, "csv")
+            if not os.path.exists(path):
+                print(f"⚠ No history fixture for {ticker}")
+                continue
+            bars = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+            if period:
+                bars = bars.tail(int(period.rstrip("d")))
+            else:
+                if start is not None:
+                    bars = bars[bars.index >= pd.Timestamp(start)]
+                if end is not None:
+                    bars = bars[bars.index < pd.Timestamp(end)]
+            if not bars.empty:
+                frames[ticker] = bars
+        return _history_frame(frames)
+
+    def info(self, ticker):
+        return self._load_json("info", ticker, {})
+
+    def news(self, ticker):
+        return self._load_json("news", ticker, [])
+
+    def newsapi(self, params):
+        return self._load_json("newsapi", _newsapi_key(params), {"status": "error", "articles": []})
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass-through provider that saves every response as a replay fixture"""
+
+    def __init__(self, inner, root=DEFAULT_FIXTURE_DIR):
+        self.inner = inner
+        self.root = root
+
+    def _save_json(self, kind, name, payload):
+        folder = os.path.join(self.root, kind)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, default=str)
+
+    def history(self, tickers, start=None, end=None, period=None):
+        raw = self.inner.history(tickers, start=start, end=end, period=period)
+        folder = os.path.join(self.root, "history")
+        os.makedirs(folder, exist_ok=True)
+        for ticker, bars in _split_history(raw, list(tickers)).items():
+            path = os.path.join(folder, f"{ticker}.csv")
+            if os.path.exists(path):
+                known = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+                bars = bars.combine_first(known)
+            bars.index.name = "Date"
+            bars.sort_index().to_csv(path)
+        return raw
+
+    def info(self, ticker):
+        payload = self.inner.info(ticker)
+        self._save_json("info", ticker, payload)
+        return payload
+
+    def news(self, ticker):
+        payload = self.inner.news(ticker)
+        self._save_json("news", ticker, payload)
+        return payload
+
+    def newsapi(self, params):
+        payload = self.inner.newsapi(params)
+        self._save_json("newsapi", _newsapi_key(params), payload)
+        return payload
+
+    def newsapi_many(self, param_list):
+        payloads = self.inner.newsapi_many(param_list)
+        for params, payload in zip(param_list, payloads):
+            self._save_json("newsapi", _newsapi_key(params), payload)
+        return payloads
+
+
+class InstrumentedProvider(MarketDataProvider):
+    """Pass-through provider that reports every call to the run recorder"""
+
+    def __init__(self, inner, recorder=recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def _measured(self, kind, method, *args, requests=1, **kwargs):
+        with self.recorder.call(kind, requests) as call:
+            payload = method(*args, **kwargs)
+            call["bytes"] = payload_size(payload)
+        return payload
+
+    def history(self, tickers, start=None, end=None, period=None):
+        return self._measured("history", self.inner.history, tickers, start=start, end=end, period=period)
+
+    def info(self, ticker):
+        return self._measured("info", self.inner.info, ticker)
+
+    def news(self, ticker):
+        return self._measured("news", self.inner.news, ticker)
+
+    def newsapi(self, params):
+        return self._measured("newsapi", self.inner.newsapi, params)
+
+    def newsapi_many(self, param_list):
+        return self._measured("newsapi", self.inner.newsapi_many, param_list, requests=len(param_list))
+
+
+def get_provider(name=None, fixtures=None):
+    """Build the provider selected by name or the ESG_PROVIDER variable"""
+    name = (name or os.getenv("ESG_PROVIDER", "live")).lower()
+    fixtures = fixtures or os.getenv("ESG_FIXTURES", DEFAULT_FIXTURE_DIR)
+    if name == "live":
+        provider = YFinanceProvider()
+    elif name == "record":
+        provider = RecordingProvider(YFinanceProvider(), fixtures)
+    elif name == "replay":
+        provider = ReplayProvider(fixtures)
+    else:
+        raise ValueError(f"Unknown market-data provider: {name}")
+    return InstrumentedProvider(provider)
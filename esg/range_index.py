@@ -0,0 +1,222 @@
+"""Constant-time return and volatility queries over any date range of a series.
+
+``RangeQueryIndex`` keeps the values and prefix sums of daily returns and
+squared daily returns, so the total return and volatility between any two
+bars come from two lookups each. Maximum drawdown needs the order of
+peaks and troughs, so it comes from a segment tree over log prices. Each
+node stores its peak, its trough and its worst peak-to-later-trough drop,
+and a range query merges O(log n) nodes.
+
+The tree is built on the first drawdown query, so return-only callers
+(the timeframe table) never pay for it. Appending a day extends the prefix
+sums and updates one leaf-to-root path of a built tree. Storage grows by
+doubling, so a daily append costs O(log n) amortised and never rebuilds the
+whole index.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+_EMPTY = (-math.inf, -1, math.inf, -1, 0.0, -1, -1)
+
+
+def _merge(left, right):
+    """Combine two adjacent segments (left first): peak, trough and worst drawdown with positions"""
+    lmax, lmax_at, lmin, lmin_at, ldd, ldd_peak, ldd_trough = left
+    rmax, rmax_at, rmin, rmin_at, rdd, rdd_peak, rdd_trough = right
+    peak = (lmax, lmax_at) if lmax >= rmax else (rmax, rmax_at)
+    trough = (lmin, lmin_at) if lmin <= rmin else (rmin, rmin_at)
+    dd, dd_peak, dd_trough = (ldd, ldd_peak, ldd_trough) if ldd <= rdd else (rdd, rdd_peak, rdd_trough)
+    cross = rmin - lmax
+    if cross < dd:
+        dd, dd_peak, dd_trough = cross, lmax_at, rmin_at
+    return (*peak, *trough, dd, dd_peak, dd_trough)
+
+
+class RangeQueryIndex:
+    """Prefix sums and a drawdown segment tree over one date-indexed value series"""
+
+    def __init__(self, series=None, periods=PERIODS_PER_YEAR):
+        self.periods = periods
+        self.n = 0
+        self._capacity = 0
+        self._alloc(max(16, len(series) if series is not None else 0))
+        if series is not None and len(series):
+            self.extend(series)
+
+    def _alloc(self, capacity):
+        """Resize the per-bar arrays to a power-of-two capacity (the tree is rebuilt on demand)"""
+        capacity = 1 << max(4, (capacity - 1).bit_length())
+        old = self.n
+        dates = np.empty(capacity, dtype="datetime64[D]")
+        values = np.empty(capacity)
+        sums = np.zeros((2, capacity + 1))
+        if old:
+            dates[:old], values[:old] = self._dates[:old], self._values[:old]
+            sums[:, :old + 1] = self._sums[:, :old + 1]
+        self._dates, self._values, self._sums = dates, values, sums
+        self._capacity = capacity
+        self._tree = None
+
+    def _build(self):
+        """Fill the tree bottom-up, one vectorised pass per level"""
+        cap, n = self._capacity, self.n
+        self._tree = [np.empty(2 * cap) for _ in range(7)]
+        mx, mx_at, mn, mn_at, dd, dd_peak, dd_trough = self._tree
+        logs = np.log(self._values[:n])
+        positions = np.arange(cap, dtype=float)
+        for arr, value in zip(self._tree, _EMPTY):
+            arr[cap:] = value
+        mx[cap:cap + n], mn[cap:cap + n], dd[cap:cap + n] = logs, logs, 0.0
+        for arr in (mx_at, mn_at, dd_peak, dd_trough):
+            arr[cap:cap + n] = positions[:n]
+        lo = cap // 2
+        while lo >= 1:
+            node = np.arange(lo, 2 * lo)
+            left, right = 2 * node, 2 * node + 1
+            take_left = mx[left] >= mx[right]
+            mx[node] = np.where(take_left, mx[left], mx[right])
+            mx_at[node] = np.where(take_left, mx_at[left], mx_at[right])
+            take_left = mn[left] <= mn[right]
+            mn[node] = np.where(take_left, mn[left], mn[right])
+            mn_at[node] = np.where(take_left, mn_at[left], mn_at[right])
+            take_left = dd[left] <= dd[right]
+            best = np.where(take_left, dd[left], dd[right])
+            best_peak = np.where(take_left, dd_peak[left], dd_peak[right])
+            best_trough = np.where(take_left, dd_trough[left], dd_trough[right])
+            with np.errstate(invalid="ignore"):
+                cross = mn[right] - mx[left]
+            use_cross = cross < best
+            dd[node] = np.where(use_cross, cross, best)
+            dd_peak[node] = np.where(use_cross, mx_at[left], best_peak)
+            dd_trough[node] = np.where(use_cross, mn_at[right], best_trough)
+            lo //= 2
+
+    def _node(self, i):
+        return tuple(arr[i] for arr in self._tree)
+
+    def append(self, date, value):
+        """Add the next bar; O(log n) amortised"""
+        date = np.datetime64(pd.Timestamp(date).date(), "D")
+        if self.n and date <= self._dates[self.n - 1]:
+            raise ValueError(f"Bars must be appended in date order: {date} is not after {self._dates[self.n - 1]}")
+        if self.n == self._capacity:
+            self._alloc(2 * self._capacity)
+        i = self.n
+        value = float(value)
+        self._dates[i], self._values[i] = date, value
+        r = value / self._values[i - 1] - 1 if i else 0.0
+        self._sums[:, i + 1] = self._sums[:, i] + (r, r * r)
+        self.n += 1
+        if self._tree is None:
+            return
+
+        node = self._capacity + i
+        log_v = math.log(value)
+        for arr, item in zip(self._tree, (log_v, i, log_v, i, 0.0, i, i)):
+            arr[node] = item
+        node //= 2
+        while node >= 1:
+            for arr, item in zip(self._tree, _merge(self._node(2 * node), self._node(2 * node + 1))):
+                arr[node] = item
+            node //= 2
+
+    def extend(self, series):
+        """Append the bars of a date-indexed series that are newer than the last one held
+
+        Filling an empty index builds it in one vectorised pass; topping up a
+        saved history with the latest days appends them one at a time.
+        """
+        series = series.dropna()
+        if self.n:
+            series = series[series.index.values.astype("datetime64[D]") > self._dates[self.n - 1]]
+        if self.n == 0 and len(series) > 1:
+            values = series.to_numpy(dtype=np.float64)
+            if len(values) > self._capacity:
+                self._alloc(len(values))
+            n = len(values)
+            self._dates[:n] = series.index.values.astype("datetime64[D]")
+            self._values[:n] = values
+            returns = np.concatenate([[0.0], values[1:] / values[:-1] - 1])
+            self._sums[:, 1:n + 1] = np.cumsum([returns, returns * returns], axis=1)
+            self.n = n
+            self._tree = None
+            return self
+        for date, value in series.items():
+            self.append(date, value)
+        return self
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def dates(self):
+        return self._dates[:self.n]
+
+    def position(self, date):
+        """Row of the last bar on or before date (-1 if date precedes the series)"""
+        return int(self.dates.searchsorted(np.datetime64(pd.Timestamp(date).date(), "D"), side="right")) - 1
+
+    def _span(self, start, end):
+        """(base row, end row): start resolves to the last bar on or before it, end likewise"""
+        i = 0 if start is None else max(self.position(start), 0)
+        j = self.n - 1 if end is None else self.position(end)
+        if j < i:
+            raise ValueError(f"Empty range: {start} to {end}")
+        return i, j
+
+    # All range methods take dates (None = the first/last bar) or, via the
+    # *_rows variants, row positions i <= j with the return counted from bar i.
+    def total_return_rows(self, i, j):
+        return float(self._values[j] / self._values[i] - 1)
+
+    def volatility_rows(self, i, j):
+        """Annualised sample standard deviation of the daily returns in (i, j]"""
+        count = j - i
+        if count < 2:
+            return math.nan
+        total = self._sums[0, j + 1] - self._sums[0, i + 1]
+        total_sq = self._sums[1, j + 1] - self._sums[1, i + 1]
+        var = max((total_sq - total * total / count) / (count - 1), 0.0)
+        return math.sqrt(var) * math.sqrt(self.periods)
+
+    def drawdown_rows(self, i, j):
+        """(max drawdown, peak row, trough row) within bars i..j; O(log n)"""
+        if self._tree is None:
+            self._build()
+        left, right = _EMPTY, _EMPTY
+        lo, hi = i + self._capacity, j + self._capacity + 1
+        while lo < hi:
+            if lo & 1:
+                left = _merge(left, self._node(lo))
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = _merge(self._node(hi), right)
+            lo //= 2
+            hi //= 2
+        _, _, _, _, dd, peak, trough = _merge(left, right)
+        return math.expm1(dd), int(peak), int(trough)
+
+    def total_return(self, start=None, end=None):
+        return self.total_return_rows(*self._span(start, end))
+
+    def volatility(self, start=None, end=None):
+        return self.volatility_rows(*self._span(start, end))
+
+    def max_drawdown(self, start=None, end=None):
+        return self.drawdown_rows(*self._span(start, end))[0]
+
+    def query(self, start=None, end=None):
+        """Total return, annualised volatility and max drawdown (with its dates) for a date range"""
+        i, j = self._span(start, end)
+        drawdown, peak, trough = self.drawdown_rows(i, j)
+        return {
+            "start": str(self._dates[i]), "end": str(self._dates[j]),
+            "total_return": self.total_return_rows(i, j),
+            "volatility": self.volatility_rows(i, j),
+            "max_drawdown": drawdown,
+            "peak": str(self._dates[peak]), "trough": str(self._dates[trough]),
+        }
@@ -0,0 +1,159 @@
+"""Calendar and drift-band rebalancing backtests.
+
+Holdings are reset to the target weights on the first trading day of every
+month, quarter or year (or on custom dates). Between rebalances the share
+quantities are constant, so each segment's value path is a single
+price x quantity product; the only Python loop runs over rebalance dates,
+not days. Trades can be charged a proportional commission with a per-trade
+minimum plus proportional slippage.
+
+``threshold_band_sweep`` compares drift-band policies for many band widths
+in a single pass over the shared returns.
+"""
+import numpy as np
+import pandas as pd
+
+from esg.portfolios import METRIC_COLUMNS, path_metrics
+
+PERIODS_PER_YEAR = 252
+SCHEDULES = {"monthly": "M", "quarterly": "Q", "annual": "Y"}
+
+
+def rebalance_positions(index, schedule):
+    """Row positions (excluding 0) where a rebalance happens"""
+    index = pd.DatetimeIndex(index)
+    if schedule is None or schedule == "none":
+        return np.array([], dtype=int)
+    if isinstance(schedule, str):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown rebalance schedule: {schedule}")
+        periods = index.to_period(SCHEDULES[schedule])
+        return np.flatnonzero(periods[1:] != periods[:-1]) + 1
+    # Custom calendar: first trading day on or after each requested date
+    positions = index.searchsorted(pd.DatetimeIndex(schedule))
+    return np.unique(positions[(positions > 0) & (positions < len(index))])
+
+
+class RebalanceResult:
+    """Value path, per-rebalance trades, holdings and turnover of a rebalancing backtest"""
+
+    def __init__(self, values, trades, rebalances, quantities):
+        self.values = values
+        self.trades = trades
+        self.rebalances = rebalances
+        self.quantities = quantities  # shares held after each rebalance
+
+    @property
+    def total_cost(self):
+        return float(self.rebalances["cost"].sum())
+
+    @property
+    def annual_turnover(self):
+        """Average one-sided turnover per year, excluding the initial purchase"""
+        years = len(self.values) / PERIODS_PER_YEAR
+        return float(self.rebalances["turnover"].iloc[1:].sum() / years) if years else np.nan
+
+
+def _trade_costs(trades, cost_bps, min_cost, slippage_bps):
+    """Commission (with per-trade minimum) plus slippage for one set of trades"""
+    notional = np.abs(trades)
+    traded = notional > 1e-9
+    commission = np.where(traded, np.maximum(notional * cost_bps / 1e4, min_cost), 0.0).sum()
+    return commission + notional.sum() * slippage_bps / 1e4
+
+
+def backtest_rebalanced(prices, weights, schedule="quarterly", initial=100000.0,
+                        cost_bps=0.0, min_cost=0.0, slippage_bps=0.0):
+    """Backtest target weights rebalanced on a calendar schedule
+
+    schedule is "monthly", "quarterly", "annual", None (buy and hold) or a
+    list of dates. prices must be a gap-free date x ticker frame.
+    """
+    if prices.isna().any().any():
+        raise ValueError("Price panel has gaps; drop or fill them before backtesting")
+    tickers = list(prices.columns)
+    target = pd.Series(weights, dtype=float).reindex(tickers).fillna(0.0)
+    target = (target / target.sum()).to_numpy()
+    panel = prices.to_numpy(dtype=np.float64)
+
+    starts = np.concatenate([[0], rebalance_positions(prices.index, schedule)])
+    holdings = np.zeros(len(tickers))
+    cash = float(initial)
+    quantities, trades, rows = [], [], []
+    for start in starts:
+        price = panel[start]
+        value = cash + price @ holdings
+        delta = target * value - price * holdings
+        cost = _trade_costs(delta, cost_bps, min_cost, slippage_bps)
+        # Costs come out of the portfolio before buying the new target
+        delta = target * (value - cost) - price * holdings
+        holdings = target * (value - cost) / price
+        cash = 0.0
+        quantities.append(holdings)
+        trades.append(delta)
+        rows.append((value, np.abs(delta).sum() / (2 * value), cost))
+
+    lengths = np.diff(np.append(starts, len(panel)))
+    daily_quantities = np.repeat(np.array(quantities), lengths, axis=0)
+    values = pd.Series((panel * daily_quantities).sum(axis=1), index=prices.index, name="Portfolio")
+    dates = prices.index[starts]
+    return RebalanceResult(
+        values=values,
+        trades=pd.DataFrame(trades, index=dates, columns=tickers),
+        rebalances=pd.DataFrame(rows, index=dates, columns=["value_before", "turnover", "cost"]),
+        quantities=pd.DataFrame(quantities, index=dates, columns=tickers),
+    )
+
+
+def threshold_band_sweep(prices, weights, bands, initial=100000.0, cost_bps=0.0,
+                         relative=False, return_values=False):
+    """Backtest drift-band rebalancing for many band widths in one pass
+
+    A portfolio is reset to target on any day a holding's weight drifts more
+    than its band from target (absolute weight points, or a fraction of the
+    target weight when relative is set). Band triggers are path dependent, so
+    the kernel walks the days once with every band's holdings held as rows of
+    a B x N array. Returns a frame indexed by band with rebalance and trade
+    counts, turnover, costs and risk/return metrics.
+    """
+    if prices.isna().any().any():
+        raise ValueError("Price panel has gaps; drop or fill them before backtesting")
+    tickers = list(prices.columns)
+    target = pd.Series(weights, dtype=float).reindex(tickers).fillna(0.0)
+    target = (target / target.sum()).to_numpy()
+    bands = np.asarray(bands, dtype=np.float64)
+    panel = prices.to_numpy(dtype=np.float64)
+    limit = bands[:, None] * (target if relative else 1.0)
+
+    holdings = np.tile(target * initial / panel[0], (len(bands), 1))
+    values = np.empty((len(panel), len(bands)))
+    values[0] = initial
+    rebalances = np.zeros(len(bands), dtype=int)
+    trades = np.zeros(len(bands), dtype=int)
+    turnover = np.zeros(len(bands))
+    costs = np.zeros(len(bands))
+    for t in range(1, len(panel)):
+        held = holdings * panel[t]
+        value = held.sum(axis=1)
+        hit = (np.abs(held / value[:, None] - target) > limit).any(axis=1)
+        if hit.any():
+            delta = target * value[hit, None] - held[hit]
+            traded = np.abs(delta)
+            cost = traded.sum(axis=1) * cost_bps / 1e4
+            value[hit] -= cost
+            holdings[hit] = target * value[hit, None] / panel[t]
+            rebalances[hit] += 1
+            trades[hit] += (traded > 1e-9).sum(axis=1)
+            turnover[hit] += traded.sum(axis=1) / (2 * (value[hit] + cost))
+            costs[hit] += cost
+        values[t] = value
+
+    years = len(panel) / PERIODS_PER_YEAR
+    table = pd.DataFrame(path_metrics(values), index=pd.Index(bands, name="band"), columns=METRIC_COLUMNS)
+    table.insert(0, "total_cost", costs)
+    table.insert(0, "annual_turnover", turnover / years)
+    table.insert(0, "trades", trades)
+    table.insert(0, "rebalances", rebalances)
+    if return_values:
+        return table, pd.DataFrame(values, index=prices.index, columns=table.index)
+    return table
@@ -0,0 +1,125 @@
+"""Rolling Sharpe, volatility, beta and correlation for many series and windows at once.
+
+``rolling_stats`` turns a date x series frame of prices (or portfolio values)
+and a date x symbol benchmark frame into daily returns. It then takes one
+cumulative sum over a matrix holding, per column, the valid-day count, the
+return and the squared return, plus the product of every series' return
+with every benchmark's. The sums over any window are differences of two rows
+of that matrix, so each extra window costs one subtraction over the matrix
+instead of a new rolling pass per statistic. Returns are centred on their
+column means before summing, which keeps the variance differences accurate
+over long histories.
+
+The result is a ``RollingStats``: one dense date x series x window x
+statistic array, with ``series`` for a chart line, ``frame`` for the tidy
+long table and ``latest`` for JSON records. A window only has a value once
+it holds ``window`` valid returns for every series it uses.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+WINDOWS = (21, 63, 126, 252)  # ~1, 3, 6 and 12 months
+OWN_STATISTICS = ("sharpe", "volatility")
+BENCHMARK_STATISTICS = ("beta", "correlation")
+
+
+class RollingStats:
+    """Rolling statistics as a date x series x window x statistic array"""
+
+    def __init__(self, values, dates, names, windows, statistics):
+        self.values = values
+        self.dates = dates
+        self.names = list(names)
+        self.windows = tuple(windows)
+        self.statistics = list(statistics)  # (statistic, benchmark or None)
+
+    def _at(self, name, window, statistic, benchmark=None):
+        return (self.names.index(name), self.windows.index(window),
+                self.statistics.index((statistic, benchmark)))
+
+    def series(self, name, window, statistic, benchmark=None):
+        """One rolling statistic of one series as a date-indexed pandas Series"""
+        i, w, s = self._at(name, window, statistic, benchmark)
+        return pd.Series(self.values[:, i, w, s], index=pd.DatetimeIndex(self.dates, name="Date"),
+                         name=statistic if benchmark is None else f"{statistic} vs {benchmark}")
+
+    def frame(self, dropna=True):
+        """Tidy long table: Date, series, window, statistic, benchmark, value"""
+        dates, names, windows, stats = np.meshgrid(
+            np.arange(len(self.dates)), np.arange(len(self.names)), np.arange(len(self.windows)),
+            np.arange(len(self.statistics)), indexing="ij")
+        table = pd.DataFrame({
+            "Date": self.dates[dates.ravel()],
+            "series": np.array(self.names, dtype=object)[names.ravel()],
+            "window": np.array(self.windows)[windows.ravel()],
+            "statistic": np.array([s for s, _ in self.statistics], dtype=object)[stats.ravel()],
+            "benchmark": np.array([b for _, b in self.statistics], dtype=object)[stats.ravel()],
+            "value": self.values.ravel(),
+        })
+        return table.dropna(subset=["value"]).reset_index(drop=True) if dropna else table
+
+    def latest(self):
+        """Last row as JSON-ready records; values without a full window are None"""
+        records = []
+        for i, name in enumerate(self.names):
+            for w, window in enumerate(self.windows):
+                for s, (statistic, benchmark) in enumerate(self.statistics):
+                    value = float(self.values[-1, i, w, s])
+                    records.append({"series": name, "window": window, "statistic": statistic,
+                                    "benchmark": benchmark, "value": None if math.isnan(value) else value})
+        return records
+
+
+def rolling_stats(levels, benchmarks, windows=WINDOWS, periods=PERIODS_PER_YEAR):
+    """Rolling Sharpe and volatility of every column of levels, and its beta and correlation to each benchmark
+
+    levels and benchmarks are date-indexed price (or value) frames;
+    benchmarks are aligned to the dates of levels. Sharpe and volatility are
+    annualised as in MetricsAccumulator (mean / std of daily returns).
+    """
+    dates = levels.index.values.astype("datetime64[D]")
+    names, symbols = list(levels.columns), list(benchmarks.columns)
+    n_series, n_bench = len(names), len(symbols)
+    prices = np.concatenate([levels.to_numpy(dtype=np.float64),
+                             benchmarks.reindex(levels.index).to_numpy(dtype=np.float64)], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = prices[1:] / prices[:-1] - 1
+    valid = np.isfinite(returns)
+    means = np.array([returns[valid[:, c], c].mean() if valid[:, c].any() else 0.0
+                      for c in range(returns.shape[1])])
+    centred = np.where(valid, returns - means, 0.0)
+    cross = centred[:, :n_series, None] * centred[:, None, n_series:]
+
+    # One cumulative sum over [count | sum | sum of squares | cross products]
+    width = returns.shape[1]
+    sums = np.zeros((len(returns) + 1, 3 * width + n_series * n_bench))
+    np.cumsum(np.concatenate([valid, centred, centred * centred, cross.reshape(len(returns), -1)], axis=1),
+              axis=0, out=sums[1:])
+
+    statistics = [(s, None) for s in OWN_STATISTICS]
+    statistics += [(s, b) for b in symbols for s in BENCHMARK_STATISTICS]
+    values = np.full((len(dates), n_series, len(windows), len(statistics)), np.nan)
+    for w, window in enumerate(windows):
+        if window < 2 or window > len(returns):
+            continue
+        block = sums[window:] - sums[:-window]  # sums over the window ending at each return
+        count, total = block[:, :width], block[:, width:2 * width]
+        total_sq = block[:, 2 * width:3 * width]
+        total_cross = block[:, 3 * width:].reshape(-1, n_series, n_bench)
+        full = np.isclose(count, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (total_sq - total * total / window) / (window - 1)
+            var = np.where(full & (var > 0), var, np.nan)
+            std = np.sqrt(var)
+            mean = total / window + means
+            cov = (total_cross - total[:, :n_series, None] * total[:, None, n_series:] / window) / (window - 1)
+            rows = values[window:, :, w]
+            rows[..., 0] = (mean[:, :n_series] * periods) / (std[:, :n_series] * math.sqrt(periods))
+            rows[..., 1] = std[:, :n_series] * math.sqrt(periods)
+            # Beta only needs the benchmark's variance, so mask on the series' window too
+            rows[..., 2::2] = np.where(full[:, :n_series, None], cov / var[:, None, n_series:], np.nan)
+            rows[..., 3::2] = cov / (std[:, :n_series, None] * std[:, None, n_series:])
+    return RollingStats(values, dates, names, windows, statistics)
@@ -0,0 +1,157 @@
+"""Monte Carlo projections of forward portfolio value.
+
+Paths are drawn either parametrically (multivariate normal or Student-t with
+the historical mean and covariance of the holdings' daily returns, projected
+onto the portfolio weights) or by block-bootstrapping the historical
+portfolio returns. They are generated in chunks sized to a memory budget, and
+each chunk is folded into a per-day histogram of log value. Fan-chart percentiles and probability of loss
+therefore need O(horizon x bins) memory no matter how many paths are drawn.
+
+Every chunk gets its own generator spawned from one SeedSequence, so results
+are identical whether chunks run serially or on a thread pool.
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_MEMORY_MB = 128
+LOG_RANGE = (-4.0, 4.0)  # log(value / initial) covered by the histogram
+BINS = 4000
+
+
+class SimulationResult:
+    """Fan-chart percentiles, probability of loss and terminal statistics"""
+
+    def __init__(self, fan, prob_loss, terminal, n_paths):
+        self.fan = fan
+        self.prob_loss = prob_loss
+        self.terminal = terminal
+        self.n_paths = n_paths
+
+    def to_dict(self, every=1):
+        """JSON-ready summary, optionally keeping every n-th day of the series"""
+        fan = self.fan.iloc[::every]
+        return {
+            "paths": self.n_paths,
+            "days": [int(d) for d in fan.index],
+            "percentiles": {str(c): [round(float(v), 2) for v in fan[c]] for c in fan.columns},
+            "prob_loss": [round(float(p), 4) for p in self.prob_loss.iloc[::every]],
+            "terminal": {k: round(float(v), 4) for k, v in self.terminal.items()},
+        }
+
+
+def _parametric_params(asset_returns, weights):
+    """Portfolio daily mean and volatility from the holdings' mean and covariance
+
+    With fixed weights a multivariate normal (or Student-t sharing one mixing
+    variable) projects exactly onto a univariate one with mean w.mu and
+    variance w'Sigma w, so paths need one draw per day rather than one per asset.
+    """
+    returns = asset_returns.dropna()
+    w = pd.Series(weights, dtype=float).reindex(returns.columns).fillna(0.0)
+    w = (w / w.sum()).to_numpy()
+    cov = returns.cov().to_numpy()
+    return {"mean": float(returns.mean().to_numpy() @ w), "vol": float(math.sqrt(w @ cov @ w))}
+
+
+def _log_returns(rng, size, horizon, method, params):
+    """size x horizon daily log returns of the portfolio for one chunk"""
+    if method == "bootstrap":
+        history, block = params["log_returns"], params["block"]
+        n_blocks = -(-horizon // block)
+        starts = rng.integers(0, len(history) - block + 1, size=(size, n_blocks))
+        index = (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :horizon]
+        return history[index]
+    shocks = rng.standard_normal((size, horizon))
+    if method == "student_t":
+        dof = params["dof"]
+        # Scale so the simulated variance matches the historical one
+        shocks *= np.sqrt((dof - 2) / rng.chisquare(dof, size=(size, horizon)))
+    return np.log1p(np.maximum(params["mean"] + params["vol"] * shocks, -0.999999))
+
+
+def _run_chunk(seed, size, horizon, method, params):
+    rng = np.random.default_rng(seed)
+    log_value = np.cumsum(_log_returns(rng, size, horizon, method, params), axis=1)
+    lo, hi = LOG_RANGE
+    bins = np.clip(((log_value - lo) / (hi - lo) * BINS).astype(np.int64), 0, BINS - 1)
+    flat = bins + np.arange(horizon) * BINS
+    hist = np.bincount(flat.ravel(), minlength=horizon * BINS).reshape(horizon, BINS)
+    terminal = np.exp(log_value[:, -1])
+    return hist, (log_value < 0).sum(axis=0), terminal.sum(), (terminal ** 2).sum()
+
+
+def _percentiles(hist, n_paths, percentiles):
+    """Per-day percentiles of log value from cumulative histogram counts"""
+    lo, hi = LOG_RANGE
+    width = (hi - lo) / BINS
+    cdf = np.cumsum(hist, axis=1)
+    out = np.empty((hist.shape[0], len(percentiles)))
+    for j, q in enumerate(percentiles):
+        rank = q / 100 * n_paths
+        k = (cdf < rank).sum(axis=1)
+        below = np.where(k > 0, cdf[np.arange(len(k)), np.maximum(k - 1, 0)], 0)
+        inside = hist[np.arange(len(k)), np.minimum(k, BINS - 1)]
+        frac = np.where(inside > 0, (rank - below) / np.maximum(inside, 1), 0.5)
+        out[:, j] = lo + (np.minimum(k, BINS - 1) + frac) * width
+    return out
+
+
+def simulate(returns, weights=None, horizon=252, n_paths=100_000, method="bootstrap",
+             block=21, dof=5, initial=100000.0, seed=0, workers=1,
+             percentiles=DEFAULT_PERCENTILES, memory_mb=DEFAULT_MEMORY_MB):
+    """Project portfolio value horizon trading days ahead
+
+    For method="bootstrap", returns is the daily portfolio return Series.
+    For "normal" or "student_t", returns is a date x ticker frame of asset
+    returns and weights the target allocation.
+    """
+    if method == "bootstrap":
+        history = np.log1p(pd.Series(returns).dropna().to_numpy())
+        if len(history) < block:
+            raise ValueError("Not enough history for the bootstrap block length")
+        params = {"log_returns": history, "block": block}
+    elif method in ("normal", "student_t"):
+        if method == "student_t" and dof <= 2:
+            raise ValueError("Student-t needs more than 2 degrees of freedom")
+        params = _parametric_params(returns, weights)
+        params["dof"] = dof
+    else:
+        raise ValueError(f"Unknown simulation method: {method}")
+
+    # Roughly four horizon-length float64/int64 arrays live per path in a chunk
+    chunk = max(1, int(memory_mb * 1024 * 1024 // (horizon * 8 * 4)))
+    sizes = [min(chunk, n_paths - lo) for lo in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, size, horizon, method, params) for s, size in zip(seeds, sizes)]
+    hist = np.zeros((horizon, BINS), dtype=np.int64)
+    losses = np.zeros(horizon, dtype=np.int64)
+    total = total_sq = 0.0
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        parts = pool.map(lambda job: _run_chunk(*job), jobs) if pool else (_run_chunk(*job) for job in jobs)
+        # Fold each chunk in as it arrives so only the running histogram is kept
+        for chunk_hist, chunk_losses, chunk_total, chunk_sq in parts:
+            hist += chunk_hist
+            losses += chunk_losses
+            total += chunk_total
+            total_sq += chunk_sq
+    finally:
+        if pool:
+            pool.shutdown()
+
+    days = pd.RangeIndex(0, horizon + 1, name="day")
+    levels = np.vstack([np.zeros(len(percentiles)), _percentiles(hist, n_paths, percentiles)])
+    fan = pd.DataFrame(initial * np.exp(levels), index=days, columns=list(percentiles))
+    prob_loss = pd.Series(np.concatenate([[0.0], losses / n_paths]), index=days, name="prob_loss")
+    mean = total / n_paths
+    terminal = {
+        "mean": initial * mean,
+        "std": initial * math.sqrt(max(total_sq / n_paths - mean ** 2, 0.0)),
+        "prob_loss": float(prob_loss.iloc[-1]),
+        "var_95": initial - float(fan.iloc[-1][5]) if 5 in fan.columns else math.nan,
+    }
+    return SimulationResult(fan, prob_loss, terminal, n_paths)
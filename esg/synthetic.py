@@ -0,0 +1,52 @@
+"""Synthetic price panels for scale testing.
+
+Prices follow correlated geometric Brownian motion: each ticker's daily
+shock mixes a few common market factors with its own noise, so pairwise
+correlations look like a real equity universe. Real panels are never clean,
+so a share of tickers only list part-way through the sample (NaN before
+their IPO date), and isolated bars are missing at random.
+"""
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+
+
+def synthetic_prices(n_tickers=16, years=5, seed=0, n_factors=3, drift=0.07, vol=0.25,
+                     factor_share=0.4, ipo_fraction=0.2, missing_rate=0.001,
+                     start="2000-01-03", dtype=np.float64, chunk=1000):
+    """Date x ticker adjusted-close panel with IPO gaps and missing bars
+
+    factor_share is the fraction of each ticker's variance explained by the
+    common factors. Tickers are generated chunk at a time so the peak memory
+    stays close to the size of the returned panel.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = int(round(years * PERIODS_PER_YEAR))
+    dates = pd.bdate_range(start, periods=n_days, name="Date")
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    factors = rng.standard_normal((n_days, n_factors))
+    panel = np.empty((n_days, n_tickers), dtype=dtype)
+
+    for lo in range(0, n_tickers, chunk):
+        hi = min(lo + chunk, n_tickers)
+        size = hi - lo
+        mu = rng.normal(drift, 0.05, size)
+        sigma = vol * rng.uniform(0.5, 1.5, size)
+        loadings = rng.standard_normal((n_factors, size))
+        loadings *= np.sqrt(factor_share) / np.linalg.norm(loadings, axis=0)
+        shocks = factors @ loadings + np.sqrt(1 - factor_share) * rng.standard_normal((n_days, size))
+        log_returns = (mu - sigma ** 2 / 2) / PERIODS_PER_YEAR + sigma / np.sqrt(PERIODS_PER_YEAR) * shocks
+        log_returns[0] = 0.0
+        start_price = rng.uniform(10, 300, size)
+        panel[:, lo:hi] = start_price * np.exp(np.cumsum(log_returns, axis=0))
+
+    # Later listings: no prices before a random IPO day in the first 80% of the sample
+    listed_late = rng.random(n_tickers) < ipo_fraction
+    ipo_day = np.where(listed_late, rng.integers(1, max(2, int(n_days * 0.8)), n_tickers), 0)
+    panel[np.arange(n_days)[:, None] < ipo_day] = np.nan
+    # Sporadic missing bars (never the first or last day)
+    if missing_rate > 0 and n_days > 2:
+        count = int(missing_rate * n_days * n_tickers)
+        panel[rng.integers(1, n_days - 1, count), rng.integers(0, n_tickers, count)] = np.nan
+    return pd.DataFrame(panel, index=dates, columns=tickers)
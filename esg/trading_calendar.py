@@ -0,0 +1,233 @@
+"""NYSE trading calendar: sessions, the last completed session and lookback offsets.
+
+Holidays are not computed at run time. ``python -m esg.trading_calendar``
+applies the exchange's rules (weekend observance, Good Friday, Juneteenth
+from 2022, one-off closures) and writes them to ``esg/nyse_holidays.py``,
+which is committed. At run time the sessions are a ``datetime64[D]`` array of
+weekdays minus those holidays. Every lookup is a ``searchsorted`` on that
+array (or on a series' own dates), so resolving many dates is one call.
+
+``last_completed_session`` is the most recent session whose 16:00 New York
+close has passed. ``period_positions`` finds, for each timeframe (1M, 3M,
+6M, YTD, 1Y), the row of a date index holding the base close, i.e. the last
+bar on or before the same day one period earlier (for YTD, the previous
+year's final bar).
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+SESSION_CLOSE = time(16, 0)
+FIRST_YEAR = 2000
+LAST_YEAR = 2040
+HOLIDAYS_MODULE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nyse_holidays.py")
+
+# Unscheduled full-day closures (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = (
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14", "2004-06-11", "2007-01-02",
+    "2012-10-29", "2012-10-30", "2018-12-05", "2025-01-09",
+)
+
+# Months back for each calendar timeframe; YTD is anchored on the year end instead
+PERIOD_MONTHS = {"1M": 1, "3M": 3, "6M": 6, "1Y": 12}
+
+
+# -----------------------------
+# OFFLINE HOLIDAY GENERATION
+# -----------------------------
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous computus)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (0=Monday) of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """Sorted full-day NYSE closures on weekdays between the two years"""
+    days = set()
+    for year in range(first_year, last_year + 1):
+        new_year = date(year, 1, 1)
+        # A Saturday New Year's Day is not observed on the Friday before
+        if new_year.weekday() != 5:
+            days.add(_observed(new_year))
+        days.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+        days.add(_nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+        days.add(_easter(year) - timedelta(days=2))  # Good Friday
+        days.add(_nth_weekday(year, 5, 0, -1))  # Memorial Day
+        if year >= 2022:
+            days.add(_observed(date(year, 6, 19)))  # Juneteenth
+        days.add(_observed(date(year, 7, 4)))
+        days.add(_nth_weekday(year, 9, 0, 1))  # Labor Day
+        days.add(_nth_weekday(year, 11, 3, 4))  # Thanksgiving
+        days.add(_observed(date(year, 12, 25)))
+    days.update(date.fromisoformat(d) for d in SPECIAL_CLOSURES)
+    return sorted(d for d in days if first_year <= d.year <= last_year and d.weekday() < 5)
+
+
+def write_holidays_module(path=HOLIDAYS_MODULE, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    holidays = nyse_holidays(first_year, last_year)
+    lines = [
+        f'"""NYSE full-day holidays {first_year}-{last_year}, generated by `python -m esg.trading_calendar`.',
+        "",
+        "Do not edit by hand; change the rules in esg/trading_calendar.py and regenerate.",
+        '"""',
+        f"FIRST_YEAR = {first_year}",
+        f"LAST_YEAR = {last_year}",
+        "",
+        "HOLIDAYS = (",
+    ]
+    for year in range(first_year, last_year + 1):
+        days = ", ".join(f'"{d.isoformat()}"' for d in holidays if d.year == year)
+        lines.append(f"    {days},")
+    lines.append(")")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return len(holidays)
+
+
+# -----------------------------
+# RUN-TIME LOOKUPS
+# -----------------------------
+def _day(value):
+    return np.datetime64(value).astype("datetime64[D]")
+
+
+def _local(now):
+    """now (default: the current time) in New York time; naive datetimes are taken as New York time"""
+    if now is None:
+        return datetime.now(EXCHANGE_TZ)
+    return now.replace(tzinfo=EXCHANGE_TZ) if now.tzinfo is None else now.astimezone(EXCHANGE_TZ)
+
+
+class TradingCalendar:
+    """Exchange sessions between two years, with vectorised lookups"""
+
+    def __init__(self, holidays=None, first_year=None, last_year=None):
+        if holidays is None:
+            from esg import nyse_holidays
+
+            holidays = nyse_holidays.HOLIDAYS
+            first_year = first_year or nyse_holidays.FIRST_YEAR
+            last_year = last_year or nyse_holidays.LAST_YEAR
+        self.first_year = first_year or FIRST_YEAR
+        self.last_year = last_year or LAST_YEAR
+        self.holidays = np.array(sorted(holidays), dtype="datetime64[D]")
+        self.busdays = np.busdaycalendar(holidays=self.holidays)
+        days = np.arange(np.datetime64(f"{self.first_year}-01-01"), np.datetime64(f"{self.last_year + 1}-01-01"))
+        self.sessions = days[np.is_busday(days, busdaycal=self.busdays)]
+
+    def _check(self, days):
+        if days.size and (days.min() < self.sessions[0] - 7 or days.max() > self.sessions[-1] + 7):
+            raise ValueError(f"Dates outside the calendar's {self.first_year}-{self.last_year} range; "
+                             "regenerate esg/nyse_holidays.py with a wider span")
+
+    def is_session(self, days):
+        """True where the given date(s) are trading days"""
+        days = np.asarray(days, dtype="datetime64[D]")
+        self._check(np.atleast_1d(days))
+        return np.is_busday(days, busdaycal=self.busdays)
+
+    def previous_session(self, days, inclusive=True):
+        """Latest session on or before each date (strictly before if not inclusive)"""
+        days = np.asarray(days, dtype="datetime64[D]")
+        self._check(np.atleast_1d(days))
+        positions = self.sessions.searchsorted(days, side="right" if inclusive else "left") - 1
+        return self.sessions[positions]
+
+    def sessions_between(self, start, end):
+        """Sessions with start <= day < end"""
+        lo, hi = self.sessions.searchsorted([_day(start), _day(end)])
+        return self.sessions[lo:hi]
+
+    def last_completed_session(self, now=None):
+        """Most recent session (a date) whose close has passed at now"""
+        local = _local(now)
+        today = np.datetime64(local.date(), "D")
+        return self.previous_session(today, inclusive=local.time() >= SESSION_CLOSE).astype(object)
+
+    def session_completed_today(self, now=None):
+        """True if the exchange held a session today (New York time) and it has closed"""
+        return self.last_completed_session(now) == _local(now).date()
+
+
+def period_positions(dates, as_of=None, periods=("1M", "3M", "6M", "YTD", "1Y")):
+    """{period: row of dates holding the base close, or None} for windows ending at as_of
+
+    dates is a sorted date index (e.g. a series' index); as_of defaults to
+    its last date. The base of "3M" is the last row on or before the same
+    calendar day three months earlier, and the base of "YTD" the last row of
+    the previous year. All anchors are resolved with one searchsorted.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if not len(dates):
+        return {period: None for period in periods}
+    end = dates[-1] if as_of is None else _day(as_of)
+    end_month = end.astype("datetime64[M]")
+    anchors = []
+    for period in periods:
+        if period == "YTD":
+            anchors.append(end.astype("datetime64[Y]").astype("datetime64[D]") - 1)
+        else:
+            month = end_month - PERIOD_MONTHS[period]
+            # Same day of month, clipped to the month's length (31 Mar -> 28/29 Feb)
+            day_of_month = end - end_month.astype("datetime64[D]")
+            last_day = (month + 1).astype("datetime64[D]") - 1
+            anchors.append(min(month.astype("datetime64[D]") + day_of_month, last_day))
+    positions = dates.searchsorted(np.array(anchors, dtype="datetime64[D]"), side="right") - 1
+    return {period: (int(p) if p >= 0 else None) for period, p in zip(periods, positions)}
+
+
+_default = None
+
+
+def default_calendar():
+    """Process-wide NYSE calendar built from esg/nyse_holidays.py"""
+    global _default
+    if _default is None:
+        _default = TradingCalendar()
+    return _default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="esg.trading_calendar",
+                                     description="Regenerate esg/nyse_holidays.py from the NYSE holiday rules")
+    parser.add_argument("--first-year", type=int, default=FIRST_YEAR)
+    parser.add_argument("--last-year", type=int, default=LAST_YEAR)
+    parser.add_argument("--output", default=HOLIDAYS_MODULE)
+    args = parser.parse_args(argv)
+    count = write_holidays_module(args.output, args.first_year, args.last_year)
+    print(f"✓ Wrote {count} holidays for {args.first_year}-{args.last_year} to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
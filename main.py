@@ -1,9 +1,21 @@
-import yfinance as yf
-import pandas as pd
+import json
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-import shutil
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from esg.backtest import Portfolio, performance_tables, timeframe_returns
+from esg.dashboard import CHART_FILES, DashboardRenderer, dashboard_html
+from esg.fetch import FetchPlanner
+from esg.instrument import in_context, recorder
+from esg.metadata import MetadataService
+from esg.metrics import MetricsEngine
+from esg.news_store import NewsStore
+from esg.pipeline import Pipeline, Stage
+from esg.range_index import RangeQueryIndex
+from esg.rolling import RollingStats, rolling_stats
+from esg.price_store import PriceStore
+from esg.providers import get_provider
 
 # -----------------------------
 # CONFIGURATION
@@ -11,7 +23,13 @@ import shutil
 START_DATE = "2019-01-01"
 END_DATE = "2025-07-01"
 INITIAL_INVESTMENT = 100000  # USD
-ROLLING_WINDOW = 126  # ~6 months
+ROLLING_WINDOW = 126  # ~6 months, the dashboard's rolling Sharpe chart
+ROLLING_WINDOWS = (21, 63, 126, 252)  # windows in docs/rolling_stats.json
+REBALANCE_SCHEDULE = None  # None (buy and hold), "monthly", "quarterly", "annual" or a list of dates
+REBALANCE_COST_BPS = 0.0  # commission per trade, in basis points of traded value
+REBALANCE_SLIPPAGE_BPS = 0.0
+PANEL_PATH = os.path.join("data", "panels", "backtest")  # memory-mapped price panel
+DASHBOARD_TEMPLATE_VERSION = "1"  # bump to force a dashboard rebuild (template edits are detected)
 
 # Portfolio tickers and weights
 stocks = [
@@ -29,246 +47,188 @@ weights = {
 }
 weights = {k: v / sum(weights.values()) for k, v in weights.items()}
 
+# Market-data source: live yfinance, or recorded fixtures via ESG_PROVIDER=replay
+provider = get_provider()
+price_store = PriceStore(provider=provider)
+
+BENCHMARKS = ["QQQ", "SPY", "ESGU"]
+
+# Stages below only see configuration through this stage, so changing any of
+# these values invalidates exactly the stages that depend on them
+def stage_config():
+    return {
+        "start": START_DATE, "end": END_DATE, "initial": INITIAL_INVESTMENT,
+        "window": ROLLING_WINDOW, "windows": ROLLING_WINDOWS, "weights": weights, "benchmarks": BENCHMARKS,
+        "rebalance": REBALANCE_SCHEDULE, "cost_bps": REBALANCE_COST_BPS,
+        "slippage_bps": REBALANCE_SLIPPAGE_BPS,
+    }
+
+
 # -----------------------------
-# DOWNLOAD PORTFOLIO DATA
+# DOWNLOAD PRICES
 # -----------------------------
-pft_raw = yf.download(portfolio, start=START_DATE, end=END_DATE, auto_adjust=False)
-
-# Handle MultiIndex or single-level columns
-if isinstance(pft_raw.columns, pd.MultiIndex):
-    if "Adj Close" in pft_raw.columns.levels[0]:
-        data = pft_raw["Adj Close"].dropna()
-    else:
-        data = pft_raw["Close"].dropna()
-else:
-    data = pft_raw.dropna()
-
-# Drop missing tickers & adjust weights
-data = data.dropna(axis=1)
-weights = {k: v for k, v in weights.items() if k in data.columns}
-if not weights:
-    raise ValueError("No valid tickers with available data!")
+def stage_fetch(config):
+    # One top-up of the local price cache for holdings and benchmarks together
+    # (ESGU is both), read into one memory-mapped panel at PANEL_PATH
+    planner = FetchPlanner(store=price_store, path=PANEL_PATH)
+    planner.add("holdings", config["weights"], config["start"], config["end"])
+    planner.add("benchmarks", config["benchmarks"], config["start"], config["end"])
+    return planner.views()
+
 
 # -----------------------------
-# CALCULATE QUANTITIES & VALUE
+# PORTFOLIO DATA
 # -----------------------------
-first_prices = data.iloc[0]
-quantities = {t: (weights[t] * INITIAL_INVESTMENT) / first_prices[t] for t in weights}
+def stage_prices(fetch):
+    panel = fetch["holdings"]
+
+    # Drop missing tickers & adjust weights
+    listed = [t for t in panel.tickers if not np.isnan(panel.column(t)).all()]
+    if not listed:
+        raise ValueError("No valid tickers with available data!")
+    return panel.dropna(listed)
 
-# Portfolio value
-portfolio_values = data[list(weights.keys())].mul(list(quantities.values()), axis=1).sum(axis=1)
-portfolio_returns = portfolio_values.pct_change().dropna()
 
 # -----------------------------
 # BENCHMARK DATA
 # -----------------------------
-bench_raw = yf.download(["QQQ", "SPY", "ESGU"], start=START_DATE, end=END_DATE, auto_adjust=False)
+def stage_benchmarks(fetch):
+    # A frame over the shared panel's buffer (charts and tables look columns up by name)
+    return fetch["benchmarks"].dropna().to_frame(copy=False)
 
-# Handle MultiIndex or single-level columns
-if isinstance(bench_raw.columns, pd.MultiIndex):
-    if "Adj Close" in bench_raw.columns.levels[0]:
-        bench_data = bench_raw["Adj Close"].dropna()
-    else:
-        bench_data = bench_raw["Close"].dropna()
-else:
-    bench_data = bench_raw.dropna()
 
 # -----------------------------
-# PERFORMANCE SNAPSHOT
+# CALCULATE QUANTITIES & VALUE
 # -----------------------------
-last_val = portfolio_values.iloc[-1]
-prev_val = portfolio_values.iloc[-2]
-daily_change_pct = ((last_val - prev_val) / prev_val) * 100
-arrow = "↑" if daily_change_pct > 0 else "↓"
-color_daily = "#28a745" if daily_change_pct > 0 else "#dc3545"
+def stage_valuation(config, prices):
+    valuation = Portfolio.from_config(config).valuation(prices)
+    if "rebalancing" in valuation:
+        rebalancing = valuation["rebalancing"]
+        print(f"Rebalanced {rebalancing['count']} times ({config['rebalance']}), "
+              f"annual turnover {rebalancing['annual_turnover']:.1%}, costs ${rebalancing['total_cost']:,.2f}")
+    return valuation
+
+
+# -----------------------------
+# ROLLING STATISTICS
+# -----------------------------
+def stage_rolling(config, valuation, prices, benchmarks):
+    # Sharpe, volatility, beta and correlation of the portfolio and every holding
+    # versus each benchmark, for all windows from one set of cumulative sums
+    levels = pd.concat([valuation["values"].rename("Portfolio"), prices.to_frame(copy=False)], axis=1)
+    windows = tuple(sorted({*config["windows"], config["window"]}))
+    rolling = rolling_stats(levels, benchmarks[config["benchmarks"]], windows)
+
+    os.makedirs("docs", exist_ok=True)
+    tmp = "docs/rolling_stats.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"as_of": str(rolling.dates[-1]), "windows": list(windows), "benchmarks": config["benchmarks"],
+                   "latest": rolling.latest()}, f, indent=2)
+    os.replace(tmp, "docs/rolling_stats.json")
+    return rolling
 
-bench_daily = {}
-for b in bench_data.columns:
-    bench_daily[b] = ((bench_data[b].iloc[-1] - bench_data[b].iloc[-2]) / bench_data[b].iloc[-2]) * 100
 
 # -----------------------------
 # PORTFOLIO METRICS
 # -----------------------------
-cagr = (portfolio_values.iloc[-1] / portfolio_values.iloc[0]) ** (252 / len(portfolio_returns)) - 1
-volatility = portfolio_returns.std() * np.sqrt(252)
-sharpe = cagr / volatility
-max_drawdown = ((portfolio_values / portfolio_values.cummax()) - 1).min()
-
-metrics = pd.DataFrame({
-    "Portfolio": [f"{cagr*100:.2f}%", f"{volatility*100:.2f}%", f"{sharpe:.2f}", f"{max_drawdown*100:.2f}%"],
-    "QQQ": [
-        f"{((bench_data['QQQ'].iloc[-1]/bench_data['QQQ'].iloc[0])**(252/len(bench_data))-1)*100:.2f}%",
-        "", "", ""
-    ],
-    "SPY": [
-        f"{((bench_data['SPY'].iloc[-1]/bench_data['SPY'].iloc[0])**(252/len(bench_data))-1)*100:.2f}%",
-        "", "", ""
-    ]
-}, index=["CAGR", "Volatility", "Sharpe Ratio", "Max Drawdown"])
+def stage_metrics(config, valuation, rolling):
+    portfolio_values = valuation["values"]
+    # Running state persists between runs, so only bars added since the last run are folded in
+    metrics_engine = MetricsEngine(window=config["window"])
+    portfolio_metrics = metrics_engine.update("backtest:portfolio", portfolio_values)
+    if os.getenv("ESG_METRICS_CHECK"):
+        mismatches = metrics_engine.check("backtest:portfolio", portfolio_values)
+        print(f"⚠ Incremental metrics differ from full recompute: {mismatches}" if mismatches else "✓ Incremental metrics match full recompute")
+    metrics_engine.save()
+    return {
+        "snapshot": portfolio_metrics.snapshot(),
+        "rolling_sharpe": rolling.series("Portfolio", config["window"], "sharpe"),
+        "drawdown": portfolio_metrics.series("drawdown"),
+    }
+
 
 # -----------------------------
 # MULTI-TIMEFRAME COMPARISON
 # -----------------------------
-def calc_return(series, days):
-    if len(series) < days:
-        return np.nan
-    return ((series.iloc[-1] / series.iloc[-days]) - 1) * 100
-
-timeframes = {
-    "1M": 21, "3M": 63, "6M": 126, "YTD": (pd.Timestamp.today().dayofyear // 7) * 5,
-    "1Y": 252, "Since Inception": len(portfolio_values) - 1
-}
-
-comparison = pd.DataFrame(index=timeframes.keys())
-comparison["Portfolio"] = [calc_return(portfolio_values, d) for d in timeframes.values()]
-for b in ["QQQ", "SPY", "ESGU"]:
-    comparison[b] = [calc_return(bench_data[b], d) for d in timeframes.values()]
+def stage_comparison(config, valuation, benchmarks, metrics):
+    return performance_tables(valuation["values"], benchmarks, metrics["snapshot"], config["benchmarks"])
 
-# FIX: use map() instead of applymap (removes deprecation warning)
-comparison = comparison.map(lambda x: f"{x:.2f}%" if pd.notnull(x) else "-")
 
 # -----------------------------
-# PRICE CHANGE & NEWS
+# NEWS
 # -----------------------------
-last_day_prices = data.iloc[-1]
-prev_day_prices = data.iloc[-2]
-price_change_colors = {
-    t: "#28a745" if last_day_prices[t] - prev_day_prices[t] > 0 else "#dc3545"
-    for t in weights
-}
+def stage_news(valuation):
+    weights = valuation["weights"]
+    metadata = MetadataService(provider=provider)
+    company_names = metadata.names(weights)
+
+    # ESG headlines collected by update_data.py win; Yahoo news is the fallback
+    stored_news = NewsStore().latest(list(weights), max_age_days=30)
+
+    def fetch_headline(t):
+        if t in stored_news:
+            article = stored_news[t]
+            return f'<a href="{article["url"]}" target="_blank">{article["title"]}</a>'
+        try:
+            news_item = provider.news(t)[0]
+            return f'<a href="{news_item["link"]}" target="_blank">{news_item["title"]}</a>'
+        except Exception:
+            return "No news available"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        news_data = dict(zip(weights, pool.map(in_context(fetch_headline), weights)))
+    return {"names": company_names, "headlines": news_data}
 
-company_names = {}
-news_data = {}
-for t in weights.keys():
-    info = yf.Ticker(t).info
-    company_names[t] = info.get("longName", t)
-    try:
-        news_item = yf.Ticker(t).news[0]
-        news_data[t] = f'<a href="{news_item["link"]}" target="_blank">{news_item["title"]}</a>'
-    except Exception:
-        news_data[t] = "No news available"
 
 # -----------------------------
 # CHARTS
 # -----------------------------
-os.makedirs("outputs/charts", exist_ok=True)
-
-# Horizontal dashboard charts
-fig, axs = plt.subplots(1, 3, figsize=(20, 6))
-
-axs[0].plot(portfolio_values)
-axs[0].set_title("Portfolio Value ($)")
-axs[0].grid(True)
-
-rolling_sharpe = (
-    (portfolio_returns.rolling(ROLLING_WINDOW).mean() * 252) /
-    (portfolio_returns.rolling(ROLLING_WINDOW).std() * np.sqrt(252))
-)
-axs[1].plot(rolling_sharpe)
-axs[1].set_title("Rolling Sharpe Ratio")
-axs[1].grid(True)
-
-drawdown = (portfolio_values / portfolio_values.cummax()) - 1
-axs[2].plot(drawdown, color="red")
-axs[2].set_title("Drawdown")
-axs[2].grid(True)
-
-plt.tight_layout()
-plt.savefig("outputs/charts/dashboard_charts.png")
-plt.close()
-
-# Portfolio vs Benchmarks growth
-plt.figure(figsize=(10, 6))
-base_val = portfolio_values.iloc[0]
-plt.plot(portfolio_values / base_val * 100000, label="Portfolio")
-for b in ["QQQ", "SPY", "ESGU"]:
-    plt.plot(bench_data[b] / bench_data[b].iloc[0] * 100000, label=b)
-plt.title("Portfolio vs Benchmarks ($ Growth)")
-plt.ylabel("Value ($)")
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/charts/portfolio_vs_benchmarks.png")
-plt.close()
+# Each figure renders in its own worker process; unchanged ones are skipped
+# (ESG_FORCE_REBUILD=1 or --force redraws everything)
+def stage_charts(config, valuation, benchmarks, metrics):
+    renderer = DashboardRenderer()
+    chart_files = renderer.charts(valuation, benchmarks, metrics, config["benchmarks"])
+    if renderer.skipped:
+        print(f"✓ Skipped {len(renderer.skipped)} unchanged charts")
+    return chart_files
+
 
 # -----------------------------
 # GENERATE HTML DASHBOARD
 # -----------------------------
-os.makedirs("docs/charts", exist_ok=True)
-shutil.copy("outputs/charts/dashboard_charts.png", "docs/charts/")
-shutil.copy("outputs/charts/portfolio_vs_benchmarks.png", "docs/charts/")
-
-# Portfolio table rows
-table_rows = ""
-for t in weights.keys():
-    color = price_change_colors[t]
-    table_rows += f"""
-    <tr>
-        <td>{t}</td>
-        <td>{company_names[t]}</td>
-        <td>{weights[t]*100:.2f}%</td>
-        <td>{quantities[t]:.2f}</td>
-        <td>{first_prices[t]:.2f}</td>
-        <td style="color:{color}; font-weight:bold;">{last_day_prices[t]:.2f}</td>
-        <td>{news_data[t]}</td>
-    </tr>
-    """
-
-# Performance snapshot card
-perf_html = f"""
-<div style="padding:10px;background:#f1f3f5;border-radius:10px;margin-bottom:20px;">
-<h2>Current Portfolio Value: ${last_val:,.2f} <span style="color:{color_daily};">{arrow} {daily_change_pct:.2f}%</span></h2>
-<p>QQQ daily: {bench_daily['QQQ']:.2f}% | SPY daily: {bench_daily['SPY']:.2f}% | ESGU daily: {bench_daily['ESGU']:.2f}%</p>
-</div>
-"""
-
-# Final HTML (UTF-8 safe)
-html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>ESG Automation Portfolio</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; padding: 20px; background-color: #f8f9fa; }}
-        h1 {{ color: #2c3e50; }}
-        table {{ border-collapse: collapse; width: 100%; margin-bottom: 20px; }}
-        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: center; }}
-        th {{ background-color: #2c3e50; color: white; }}
-        tr:nth-child(even) {{ background-color: #f2f2f2; }}
-        tr:hover {{ background-color: #ddd; }}
-        img {{ max-width: 100%; display: block; margin: auto; }}
-    </style>
-</head>
-<body>
-    <h1>ESG Automation Portfolio Dashboard</h1>
-
-    {perf_html}
-
-    <h2>Portfolio Allocation & News</h2>
-    <table>
-        <tr>
-            <th>Ticker</th><th>Name</th><th>Weight</th><th>Quantity</th>
-            <th>Initial Price</th><th>Last Price</th><th>News</th>
-        </tr>
-        {table_rows}
-    </table>
-
-    <h2>Portfolio vs Benchmarks (Metrics)</h2>
-    {metrics.to_html(classes="data", header=True)}
-
-    <h2>Multi-Timeframe Performance (%)</h2>
-    {comparison.to_html(classes="data", header=True)}
-
-    <h2>Charts</h2>
-    <img src="charts/dashboard_charts.png" alt="Dashboard Charts">
-    <h3>Portfolio vs Benchmarks ($ Growth)</h3>
-    <img src="charts/portfolio_vs_benchmarks.png" alt="Portfolio vs Benchmarks">
-</body>
-</html>
-"""
-
-# FIX: Use UTF-8 encoding for file write (avoids UnicodeEncodeError)
-with open("docs/index.html", "w", encoding="utf-8") as f:
-    f.write(html_content)
-
-print("GitHub Pages dashboard generated at docs/index.html")
+def stage_html(valuation, comparison, news, charts):
+    path = DashboardRenderer().html(valuation, comparison, news)
+    print(f"GitHub Pages dashboard generated at {path}")
+    return path
+
+
+# -----------------------------
+# PIPELINE
+# -----------------------------
+# News, metrics and charts only depend on the valuation, so they run side by
+# side; every stage except the data sources is memoized in data/artifacts
+pipeline = Pipeline([
+    Stage("config", stage_config, memoize=False),
+    Stage("fetch", stage_fetch, ["config"], memoize=False),
+    Stage("prices", stage_prices, ["fetch"], memoize=False),
+    Stage("benchmarks", stage_benchmarks, ["fetch"], memoize=False),
+    Stage("valuation", stage_valuation, ["config", "prices"], uses=[Portfolio.valuation]),
+    Stage("rolling", stage_rolling, ["config", "valuation", "prices", "benchmarks"],
+          uses=[rolling_stats, RollingStats.latest], outputs=["docs/rolling_stats.json"]),
+    Stage("metrics", stage_metrics, ["config", "valuation", "rolling"], uses=[RollingStats.series]),
+    Stage("comparison", stage_comparison, ["config", "valuation", "benchmarks", "metrics"],
+          uses=[performance_tables, timeframe_returns, RangeQueryIndex.total_return_rows]),
+    Stage("news", stage_news, ["valuation"], memoize=False),
+    Stage("charts", stage_charts, ["config", "valuation", "benchmarks", "metrics"],
+          uses=[DashboardRenderer.chart_jobs, DashboardRenderer.charts],
+          outputs=[os.path.join("docs/charts", name) for name in CHART_FILES]),
+    Stage("html", stage_html, ["valuation", "comparison", "news", "charts"],
+          outputs=["docs/index.html"], version=DASHBOARD_TEMPLATE_VERSION,
+          uses=[dashboard_html, DashboardRenderer.html]),
+], name="backtest")
+
+if __name__ == "__main__":
+    pipeline.run()
+    print(pipeline.summary())
+    # Per-stage time, memory and network use (ESG_PROMETHEUS_DIR adds a textfile)
+    recorder.write_report("backtest")
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg.backtest import Portfolio
+from esg.panel import PricePanel
+
+
+def _panel():
+    index = pd.bdate_range("2024-01-01", periods=130, name="Date")
+    growth = np.linspace(1.0, 2.0, len(index))
+    return PricePanel.from_frame(pd.DataFrame({"UP": 50 * growth, "FLAT": 20.0}, index=index))
+
+
+@pytest.mark.parametrize("rebalance", [None, "monthly"])
+def test_quantities_are_the_shares_held_at_the_end(rebalance):
+    panel = _panel()
+    valuation = Portfolio({"UP": 0.5, "FLAT": 0.5}, 1000.0, rebalance).valuation(panel)
+    quantities, last = valuation["quantities"], valuation["last_prices"]
+    assert sum(quantities[t] * last[t] for t in quantities) == pytest.approx(valuation["values"].iloc[-1])
+    if rebalance:
+        # Trimmed back to half after UP's rise, so fewer UP shares than at the start
+        assert quantities["UP"] < 500 / 50 and quantities["FLAT"] > 500 / 20
+    else:
+        assert quantities == pytest.approx({"UP": 10.0, "FLAT": 25.0})
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+from esg.cli import HEAVY_MODULES, STATUS_BUDGET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_status_starts_within_budget_without_heavy_imports():
+    # --budget defaults to STATUS_BUDGET, timed from process start, and fails on a heavy import
+    result = subprocess.run([sys.executable, "-m", "esg", "status", "--budget"],
+                            cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert f"without loading {', '.join(HEAVY_MODULES)}" in result.stdout
+    elapsed = float(result.stdout.rsplit("✓ Finished in ", 1)[1].split("s", 1)[0])
+    assert elapsed < STATUS_BUDGET
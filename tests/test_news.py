@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+
+from esg.news import AsyncNewsClient
+from esg.news_stub import start_stub_server
+
+
+@contextmanager
+def _stub(latency=0.0):
+    server, url = start_stub_server(latency=latency)
+    try:
+        yield server, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _params(n, page_size=2):
+    return [{"q": f"T{i} AND ESG", "apiKey": "stub", "pageSize": page_size} for i in range(n)]
+
+
+def test_responses_come_back_in_input_order():
+    with _stub() as (server, url):
+        responses = AsyncNewsClient(url, rate=0).run(_params(6))
+    assert [r["status"] for r in responses] == ["ok"] * 6
+    assert [r["articles"][0]["title"] for r in responses] == [f"T{i} sustainability update #1" for i in range(6)]
+    assert server.requests == 6
+
+
+def test_concurrency_is_bounded_and_shared():
+    with _stub(latency=0.2) as (server, url):
+        started = time.perf_counter()
+        AsyncNewsClient(url, max_concurrency=2, rate=0).run(_params(8))
+        elapsed = time.perf_counter() - started
+    assert server.peak_in_flight == 2
+    assert elapsed >= 4 * 0.2  # 8 requests, 2 at a time
+
+
+def test_slow_requests_time_out_individually():
+    with _stub(latency=1.0) as (_, url):
+        responses = AsyncNewsClient(url, rate=0, request_timeout=0.2, batch_timeout=5).run(_params(3))
+    assert [r["status"] for r in responses] == ["error"] * 3
+    assert all(r["message"] == "request timed out after 0.2s" for r in responses)
+
+
+def test_batch_deadline_cancels_unfinished_requests():
+    with _stub(latency=0.4) as (_, url):
+        started = time.perf_counter()
+        responses = AsyncNewsClient(url, max_concurrency=1, rate=0, request_timeout=5, batch_timeout=0.6).run(
+            _params(4))
+        elapsed = time.perf_counter() - started
+    assert responses[0]["status"] == "ok"
+    assert [r["message"] for r in responses[2:]] == ["batch deadline of 0.6s exceeded"] * 2
+    assert elapsed < 2 * 0.4 + 0.5  # did not wait for the last two requests
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, UTC
+
+from esg.news_store import NewsStore, _utc_iso
+
+
+def _article(title, published):
+    return {"url": f"https://example.com/{title}", "title": title, "publishedAt": _utc_iso(published)}
+
+
+def test_quiet_tickers_advance_to_their_last_complete_fetch(tmp_path):
+    store = NewsStore(str(tmp_path / "news.sqlite"))
+    now = datetime.now(UTC)
+    floor = _utc_iso(now - timedelta(days=30))
+    assert store.since(["MSFT", "DDD"], 30) == floor
+
+    store.add({"MSFT": [_article("msft", now - timedelta(days=2))]})
+    assert store.since(["MSFT", "DDD"], 30) == floor  # DDD has no articles yet
+
+    fetched_at = now - timedelta(hours=1)
+    store.mark_fetched(["MSFT", "DDD"], fetched_at)
+    store.mark_fetched(["DDD"], now - timedelta(days=3))  # an older fetch never moves it back
+    assert store.since(["MSFT", "DDD"], 30) == _utc_iso(fetched_at)
+    assert store.since(["MSFT", "DDD", "SSYS"], 30) == floor
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg.optimize import PortfolioOptimizer, solve_qp
+
+
+def _returns(scales=(1, 1, 3, 5), periods=500):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(0.0005, 0.01, (periods, len(scales))) * np.array(scales),
+                        columns=list("abcd")[:len(scales)])
+
+
+def test_infeasible_groups_raise():
+    groups = {"x": (["a", "b"], 0.7, 1.0), "y": (["c", "d"], 0.5, 1.0)}
+    with pytest.raises(ValueError, match="cannot all be met"):
+        PortfolioOptimizer(_returns(), groups=groups, cache_dir=None)
+
+
+def test_infeasible_qp_raises():
+    A = np.array([[1.0, 1.0], [1.0, 0.0], [0.0, 1.0]])
+    with pytest.raises(ValueError, match="infeasible"):
+        solve_qp(np.eye(2), np.zeros(2), A, np.array([1.0, 0.6, 0.6]), np.array([1.0, 1.0, 0.3]))
+
+
+def test_solutions_respect_bounds_and_groups():
+    optimizer = PortfolioOptimizer(_returns(), bounds=(0.1, 0.35), groups={"x": (["c", "d"], 0.3, 0.6)},
+                                   cache_dir=None)
+    for weights in (optimizer.min_variance(), optimizer.max_sharpe(), optimizer.max_return()):
+        assert weights.sum() == pytest.approx(1.0)
+        assert optimizer.violations(weights) == []
+
+
+def test_risk_parity_rejects_constraints_it_breaks():
+    optimizer = PortfolioOptimizer(_returns(), bounds=(0.1, 0.35), cache_dir=None)
+    with pytest.raises(ValueError, match="Risk parity weights break constraints"):
+        optimizer.risk_parity()
+    weights = PortfolioOptimizer(_returns(), cache_dir=None).risk_parity()
+    contributions = PortfolioOptimizer(_returns(), cache_dir=None).risk_contributions(weights)
+    np.testing.assert_allclose(contributions, 0.25, atol=1e-6)
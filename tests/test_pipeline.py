@@ -0,0 +1,47 @@
+from esg import pipeline
+from esg.pipeline import Pipeline, Stage, code_dependencies
+from esg.simulation import simulate
+
+
+def _pipeline(tmp_path, calls, output):
+    def write():
+        calls.append("write")
+        output.write_text("mine")
+        return str(output)
+
+    return Pipeline([Stage("write", write, outputs=[str(output)])], artifact_dir=str(tmp_path / "artifacts"),
+                    workers=1, force=False)
+
+
+def test_stage_reruns_when_an_output_is_overwritten(tmp_path):
+    calls, output = [], tmp_path / "chart.png"
+    _pipeline(tmp_path, calls, output).run()
+    _pipeline(tmp_path, calls, output).run()
+    assert calls == ["write"]
+
+    output.write_text("written by another script")
+    rerun = _pipeline(tmp_path, calls, output)
+    rerun.run()
+    assert calls == ["write", "write"]
+    assert rerun.ran == ["write"]
+    assert output.read_text() == "mine"
+
+
+def _paths(growth):
+    return simulate(growth, horizon=5, n_paths=10)
+
+
+def _project(growth):
+    return _paths(growth).terminal
+
+
+def test_key_covers_script_helpers_and_the_esg_modules_they_call(monkeypatch):
+    code, sources = code_dependencies([_project])
+    assert [name for name, _ in code] == ["_project", "_paths"]
+    assert "esg.simulation" in dict(sources)
+
+    stage = Stage("projection", _project, ["growth"])
+    key = stage.key({"growth": "abc"})
+    _, imports, names = pipeline._module_source("esg.simulation")
+    monkeypatch.setitem(pipeline._module_sources, "esg.simulation", ("edited", imports, names))
+    assert stage.key({"growth": "abc"}) != key
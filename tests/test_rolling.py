@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from esg.rolling import rolling_stats
+
+
+def _prices(columns, periods=400, seed=0, scale=0.02):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2019-01-01", periods=periods, name="Date")
+    walks = np.exp(np.cumsum(rng.normal(0.0005, scale, (periods, len(columns))), axis=0))
+    return pd.DataFrame(100 * walks, index=index, columns=columns)
+
+
+def test_matches_pandas_rolling_for_a_series_that_starts_late():
+    levels = _prices(["Early", "Late"])
+    levels.iloc[:150, 1] = np.nan  # listed after the benchmark
+    benchmarks = _prices(["QQQ", "SPY"], seed=1, scale=0.01)
+    rolling = rolling_stats(levels, benchmarks, windows=(21, 63))
+
+    returns = levels.pct_change(fill_method=None)
+    bench_returns = benchmarks.pct_change(fill_method=None)
+    for name in levels.columns:
+        for window in (21, 63):
+            r, b = returns[name].rolling(window), bench_returns["SPY"].rolling(window)
+            expected = {
+                "sharpe": (r.mean() * 252) / (r.std() * np.sqrt(252)),
+                "volatility": r.std() * np.sqrt(252),
+            }
+            for statistic, values in expected.items():
+                got = rolling.series(name, window, statistic)
+                np.testing.assert_allclose(got, values, rtol=1e-8)
+            beta = r.cov(bench_returns["SPY"]) / b.var()
+            corr = r.corr(bench_returns["SPY"])
+            np.testing.assert_allclose(rolling.series(name, window, "beta", "SPY"), beta, rtol=1e-8)
+            np.testing.assert_allclose(rolling.series(name, window, "correlation", "SPY"), corr, rtol=1e-8)
+
+    late_beta = rolling.series("Late", 21, "beta", "QQQ")
+    assert late_beta.iloc[:150 + 21].isna().all()
+    assert late_beta.iloc[150 + 21:].notna().all()
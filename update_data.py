@@ -1,16 +1,46 @@
 import json
 import numpy as np
-import yfinance as yf
 import pandas as pd
-import requests
-from datetime import datetime, UTC, timedelta
+from datetime import date, datetime, UTC, timedelta
 import os
-import matplotlib.pyplot as plt
 import time
 
+from esg.charts import line_chart, render_charts
+from esg.fetch import FetchPlanner
+from esg.instrument import recorder
+from esg.manifest import OutputManifest
+from esg.metadata import MetadataService
+from esg.metrics import MetricsEngine
+from esg.news_store import NewsStore
+from esg.news_queries import attribute_articles, company_aliases, plan_news_queries
+from esg.pipeline import Pipeline, Stage
+from esg.price_store import PriceStore
+from esg.providers import get_provider
+from esg.simulation import simulate
+from esg.trading_calendar import EXCHANGE_TZ, SESSION_CLOSE, default_calendar
+
 # Get News API Key from environment
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
+# Prices, company info and news all go through one provider (see esg/providers.py)
+provider = get_provider()
+metadata = MetadataService(provider=provider)
+news_store = NewsStore()
+
+# Articles requested per packed NewsAPI query (100 is the API maximum)
+NEWS_PAGE_SIZE = 100
+# Headlines older than this are not shown; stored articles are kept longer
+NEWS_LOOKBACK_DAYS = 30
+NEWS_RETENTION_DAYS = 180
+
+# Shared price panel; the latest closes are looked up in its last few weeks
+PANEL_PATH = os.path.join("data", "panels", "refresh")
+LATEST_LOOKBACK_DAYS = 14
+
+# Monte Carlo projection of portfolio value (see esg/simulation.py)
+PROJECTION_DAYS = 252
+PROJECTION_PATHS = 100_000
+
 # ESG Portfolio (same as before)
 portfolio_allocations = {
     "ROK": {"weight": 5.56, "quantity": 27.35, "initial_price": 203.14},
@@ -32,66 +62,73 @@ portfolio_allocations = {
 }
 
 
-def fetch_live_prices(tickers):
-    """Fetch live prices for multiple tickers as of yesterday with retry and fallback"""
-    results = {}
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    
-    for ticker in tickers:
-        try:
-            # Fetch data for yesterday specifically
-            data = yf.download(ticker, start=yesterday, end=yesterday, auto_adjust=False, progress=False)
-            if data.empty:
-                print(f"⚠ No data for {ticker} on {yesterday}")
-                # Fallback to most recent available data
-                fallback_data = yf.download(ticker, period="5d", auto_adjust=False, progress=False)
-                if not fallback_data.empty:
-                    results[ticker] = float(fallback_data["Adj Close"].iloc[-1].item())
-                    print(f"⚠ Using most recent data for {ticker}: {results[ticker]}")
-                else:
-                    results[ticker] = 0
-            else:
-                results[ticker] = float(data["Adj Close"].iloc[-1].item()) if not data["Adj Close"].empty else 0
-                print(f"✓ Fetched {ticker} price for {yesterday}: {results[ticker]}")
-        except Exception as e:
-            print(f"⚠ Failed to fetch {ticker}: {e}")
-            results[ticker] = 0
-    return results
-
-def fetch_newsapi_articles(ticker):
-    """Fetch ESG-related news via NewsAPI"""
+def fetch_live_prices(prices, session, lookback=5):
+    """Latest close as of the last completed session for every ticker, from the run's shared price panel"""
+    tickers = prices.tickers
+    closes = prices.to_frame(copy=False).loc[:session].tail(lookback)
+
+    # Latest valid close per ticker; tickers without a bar for the session fall
+    # back to their most recent close inside the lookback window
+    latest = closes.ffill().iloc[-1] if not closes.empty else pd.Series(index=tickers, dtype=float)
+    last_seen = closes.notna().iloc[::-1].idxmax() if not closes.empty else pd.Series(index=tickers, dtype=object)
+    stale = latest.notna() & (last_seen < pd.Timestamp(session))
+
+    for ticker in latest.index[latest.isna()]:
+        print(f"⚠ No data for {ticker} in the last {lookback} sessions")
+    for ticker in latest.index[stale]:
+        print(f"⚠ Using most recent data for {ticker} ({last_seen[ticker]:%Y-%m-%d}): {latest[ticker]}")
+    print(f"✓ Found {int(latest.notna().sum())}/{len(tickers)} prices for {session}")
+    return latest.fillna(0).astype(float).to_dict()
+
+def fetch_newsapi_articles(tickers):
+    """Fetch ESG-related articles newer than the last seen ones into the local news store"""
     if not NEWS_API_KEY:
-        return None
-    url = "https://newsapi.org/v2/everything"
-    query = f'{ticker} AND (ESG OR sustainability OR environmental OR governance OR "social responsibility")'
-    params = {
+        return 0
+    aliases = {t: company_aliases(fields) for t, fields in metadata.get_many(tickers).items()}
+    plan = plan_news_queries(tickers, aliases)
+    param_list = [{
         'q': query,
         'apiKey': NEWS_API_KEY,
         'language': 'en',
         'sortBy': 'publishedAt',
-        'pageSize': 1,
-        'from': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        'pageSize': NEWS_PAGE_SIZE,
+        # NewsAPI takes a naive UTC timestamp
+        'from': news_store.since(group, NEWS_LOOKBACK_DAYS).rstrip('Z')
+    } for query, group in plan]
+    added = 0
+    requested_at = datetime.now(UTC)
+    for (_, group), data in zip(plan, provider.newsapi_many(param_list)):
+        if data.get("status") != "ok":
+            print(f"⚠ Error fetching news for {', '.join(group)}: {data.get('message', 'invalid key')}")
+            continue
+        articles = data.get("articles", [])
+        added += news_store.add(attribute_articles(articles, {t: aliases[t] for t in group}))
+        # A full page may have cut off older articles, so only a complete answer moves the watermark
+        if data.get("totalResults", len(articles)) <= len(articles):
+            news_store.mark_fetched(group, requested_at)
+    print(f"✓ News: {len(param_list)} NewsAPI requests for {len(tickers)} tickers, {added} new articles")
+    return added
+
+
+def latest_news_html(tickers):
+    """Newest stored headline per ticker from the last NEWS_LOOKBACK_DAYS, as HTML links"""
+    latest = news_store.latest(tickers, max_age_days=NEWS_LOOKBACK_DAYS)
+    for ticker in tickers:
+        if ticker not in latest:
+            print(f"⚠ No news for {ticker}")
+    return {
+        t: f'<a href="{article["url"]}" target="_blank">{article["title"]}</a>'
+        for t, article in latest.items()
     }
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        if data.get("status") == "ok" and data.get("articles"):
-            article = data["articles"][0]
-            return f'<a href="{article["url"]}" target="_blank">{article["title"]}</a>'
-        else:
-            print(f"⚠ No news or invalid key for {ticker}")
-            return None
-    except Exception as e:
-        print(f"⚠ Error fetching news for {ticker}: {e}")
-        return None
-
-
-def calculate_metrics(portfolio_daily):
-    """Calculate portfolio performance metrics"""
+
+
+def calculate_metrics(metrics_engine, name, portfolio_daily):
+    """Calculate portfolio performance metrics, folding only new days into the saved state"""
     cum_return = (1 + portfolio_daily).cumprod()
-    total_return = float(cum_return.iloc[-1] - 1)
-    cagr = float(cum_return.iloc[-1] ** (1 / 3) - 1)
-    max_drawdown = float((cum_return / np.maximum.accumulate(cum_return) - 1).min())
+    state = metrics_engine.update(name, cum_return)
+    total_return = float(state.last - 1)
+    cagr = float(state.last ** (1 / 3) - 1)
+    max_drawdown = float(state.max_drawdown)
     return total_return, cagr, max_drawdown
 
 def calculate_sharpe_ratio(returns, risk_free_rate=0.03):
@@ -99,113 +136,195 @@ def calculate_sharpe_ratio(returns, risk_free_rate=0.03):
     excess_returns = returns - risk_free_rate/252  # Daily risk-free rate
     return (returns.mean() * 252) / (returns.std() * np.sqrt(252))
 
-# Create output directories
-os.makedirs("docs/charts", exist_ok=True)
+def stage_config():
+    # Last session whose close has passed (Friday's on a weekend, skipping holidays)
+    session = default_calendar().last_completed_session()
+    return {
+        "allocations": portfolio_allocations, "benchmarks": ["QQQ", "SPY"], "start": "2022-01-01",
+        "projection_days": PROJECTION_DAYS, "projection_paths": PROJECTION_PATHS,
+        "session": session.isoformat(),
+    }
+
 
-# Fetch live prices
-tickers = list(portfolio_allocations.keys())
-live_prices = fetch_live_prices(tickers)
+# One price-cache top-up for the history, the benchmarks and the latest closes
+# (the allocations are in both), read into one memory-mapped panel
+def stage_fetch(config):
+    planner = FetchPlanner(store=PriceStore(provider=provider), path=PANEL_PATH)
+    planner.add("history", list(config["allocations"]) + config["benchmarks"], config["start"])
+    latest_from = date.fromisoformat(config["session"]) - timedelta(days=LATEST_LOOKBACK_DAYS)
+    planner.add("latest", config["allocations"], latest_from)
+    return planner.views()
 
-# After fetching prices
-for ticker, price in live_prices.items():
-    if price == 0:
-        print(f"⚠️ Warning: Unable to get valid price for {ticker}")
+
+# Latest closes
+def stage_live_prices(config, fetch):
+    live_prices = fetch_live_prices(fetch["latest"], config["session"])
+
+    # After fetching prices
+    for ticker, price in live_prices.items():
+        if price == 0:
+            print(f"⚠️ Warning: Unable to get valid price for {ticker}")
+    return live_prices
 
 # Add this function:
 def get_company_names(tickers):
-    """Get actual company names for tickers"""
-    names = {}
-    for ticker in tickers:
-        try:
-            info = yf.Ticker(ticker).info
-            names[ticker] = info.get('longName', f"{ticker}")
-        except:
-            names[ticker] = f"{ticker}"
+    """Get actual company names for tickers (cached on disk, fetched concurrently)"""
+    names = metadata.names(tickers)
+    stats = metadata.stats()
+    print(f"✓ Company names: {stats['hits']} cached, {stats['misses']} fetched, {stats['errors']} failed")
     return names
 
-company_names = get_company_names(tickers)
-
-# Build holdings list with news
-holdings = []
-for ticker, info in portfolio_allocations.items():
-    last_price = round(live_prices.get(ticker, 0), 2)
-    news_html = fetch_newsapi_articles(ticker) or "No news available"
-    holdings.append({
-        "ticker": ticker,
-        "name": company_names.get(ticker, f"{ticker}"),
-        "weight": f"{info['weight']}%",
-        "quantity": info["quantity"],
-        "initial_price": info["initial_price"],
-        "last_price": last_price,
-        "news": news_html
-    })
+
+def stage_names(config):
+    return get_company_names(list(config["allocations"]))
+
+
+def stage_news(config):
+    tickers = list(config["allocations"])
+    fetch_newsapi_articles(tickers)
+    news_store.prune(NEWS_RETENTION_DAYS)
+    return latest_news_html(tickers)
+
 
 # Backtest: Portfolio vs Benchmarks
-benchmarks = ["QQQ", "SPY"]
-data = yf.download(tickers + benchmarks, start="2022-01-01", auto_adjust=False, progress=False)["Adj Close"]
-
-# Portfolio Growth
-weights = np.array([v["weight"] for v in portfolio_allocations.values()])
-weights = weights / weights.sum()
-portfolio_returns = data[tickers].pct_change(fill_method=None).dropna().dot(weights)
-portfolio_growth = (1 + portfolio_returns).cumprod()
-
-# Benchmark Growth
-qqq_growth = (1 + data["QQQ"].pct_change(fill_method=None).dropna()).cumprod()
-spy_growth = (1 + data["SPY"].pct_change(fill_method=None).dropna()).cumprod()
-
-# Plot comparison chart
-plt.figure(figsize=(10, 5))
-plt.plot(portfolio_growth.index, portfolio_growth, label="ESG Portfolio", linewidth=2)
-plt.plot(qqq_growth.index, qqq_growth, label="QQQ Benchmark", linestyle="--")
-plt.plot(spy_growth.index, spy_growth, label="SPY Benchmark", linestyle="--")
-plt.title("Portfolio vs Benchmarks Growth")
-plt.legend()
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("docs/charts/portfolio_vs_benchmarks.png")
-plt.close()
+def stage_history(fetch):
+    return fetch["history"].to_frame(copy=False)
+
+
+def stage_growth(config, history):
+    data = history
+    tickers = list(config["allocations"])
+
+    # Portfolio Growth
+    weights = np.array([v["weight"] for v in config["allocations"].values()])
+    weights = weights / weights.sum()
+    portfolio_returns = data[tickers].pct_change(fill_method=None).dropna().dot(weights)
+
+    # Benchmark Growth
+    qqq_returns = data["QQQ"].pct_change(fill_method=None).dropna()
+    spy_returns = data["SPY"].pct_change(fill_method=None).dropna()
+    return {
+        "portfolio_returns": portfolio_returns, "qqq_returns": qqq_returns, "spy_returns": spy_returns,
+        "portfolio_growth": (1 + portfolio_returns).cumprod(),
+        "qqq_growth": (1 + qqq_returns).cumprod(),
+        "spy_growth": (1 + spy_returns).cumprod(),
+    }
+
+
+# Plot comparison chart (skipped when the growth series are unchanged)
+def stage_chart(growth):
+    os.makedirs("docs/charts", exist_ok=True)
+    output_manifest = OutputManifest()
+    render_charts([(line_chart, {
+        "path": "docs/charts/portfolio_vs_benchmarks.png",
+        "series": {"ESG Portfolio": growth["portfolio_growth"], "QQQ Benchmark": growth["qqq_growth"],
+                   "SPY Benchmark": growth["spy_growth"]},
+        "title": "Portfolio vs Benchmarks Growth",
+        "figsize": (10, 5),
+        "styles": {"ESG Portfolio": {"linewidth": 2}, "QQQ Benchmark": {"linestyle": "--"},
+                   "SPY Benchmark": {"linestyle": "--"}},
+    })], manifest=output_manifest)
+    output_manifest.save()
+    return "charts/portfolio_vs_benchmarks.png"
+
 
 # Calculate metrics
-portfolio_total_return, portfolio_cagr, portfolio_mdd = calculate_metrics(portfolio_returns)
-qqq_total_return, qqq_cagr, qqq_mdd = calculate_metrics(data["QQQ"].pct_change(fill_method=None).dropna())
-spy_total_return, spy_cagr, spy_mdd = calculate_metrics(data["SPY"].pct_change(fill_method=None).dropna())
-portfolio_sharpe = calculate_sharpe_ratio(portfolio_returns)
-
-benchmark_metrics = {
-    "Portfolio": {
-        "Total Return": f"{portfolio_total_return:.2%}",
-        "CAGR": f"{portfolio_cagr:.2%}",
-        "Max Drawdown": f"{portfolio_mdd:.2%}",
-        "Sharpe Ratio": f"{portfolio_sharpe:.2f}"
-    },
-    "QQQ": {
-        "Total Return": f"{qqq_total_return:.2%}",
-        "CAGR": f"{qqq_cagr:.2%}",
-        "Max Drawdown": f"{qqq_mdd:.2%}"
-    },
-    "SPY": {
-        "Total Return": f"{spy_total_return:.2%}",
-        "CAGR": f"{spy_cagr:.2%}",
-        "Max Drawdown": f"{spy_mdd:.2%}"
+def stage_metrics(growth):
+    metrics_engine = MetricsEngine()
+    portfolio_returns = growth["portfolio_returns"]
+    portfolio_total_return, portfolio_cagr, portfolio_mdd = calculate_metrics(metrics_engine, "refresh:portfolio", portfolio_returns)
+    qqq_total_return, qqq_cagr, qqq_mdd = calculate_metrics(metrics_engine, "refresh:QQQ", growth["qqq_returns"])
+    spy_total_return, spy_cagr, spy_mdd = calculate_metrics(metrics_engine, "refresh:SPY", growth["spy_returns"])
+    metrics_engine.save()
+    portfolio_sharpe = calculate_sharpe_ratio(portfolio_returns)
+
+    return {
+        "Portfolio": {
+            "Total Return": f"{portfolio_total_return:.2%}",
+            "CAGR": f"{portfolio_cagr:.2%}",
+            "Max Drawdown": f"{portfolio_mdd:.2%}",
+            "Sharpe Ratio": f"{portfolio_sharpe:.2f}"
+        },
+        "QQQ": {
+            "Total Return": f"{qqq_total_return:.2%}",
+            "CAGR": f"{qqq_cagr:.2%}",
+            "Max Drawdown": f"{qqq_mdd:.2%}"
+        },
+        "SPY": {
+            "Total Return": f"{spy_total_return:.2%}",
+            "CAGR": f"{spy_cagr:.2%}",
+            "Max Drawdown": f"{spy_mdd:.2%}"
+        }
     }
-}
+
+
+# Forward projection: block bootstrap of the portfolio's daily returns, per $100k invested
+def stage_projection(config, growth):
+    projection = simulate(growth["portfolio_returns"], horizon=config["projection_days"],
+                          n_paths=config["projection_paths"], workers=os.cpu_count() or 1)
+    print(f"✓ Projection: {projection.terminal['prob_loss']:.1%} chance of a loss after {config['projection_days']} trading days")
+    return projection.to_dict(every=21)
+
 
 # === Final JSON Output ===
-yesterday = datetime.now() - timedelta(days=1)
-output = {
-    "portfolio_weights": {k: v["weight"] for k, v in portfolio_allocations.items()},
-    "metrics": benchmark_metrics,
-    "holdings": holdings,
-    "last_updated": yesterday.replace(hour=16, minute=0, second=0, microsecond=0, tzinfo=UTC).isoformat(),
-    "data_date": yesterday.strftime('%Y-%m-%d'),
-    "chart_path": "charts/portfolio_vs_benchmarks.png"
-}
+def stage_output(config, live_prices, names, news, metrics, chart, projection):
+    # Build holdings list with news
+    holdings = []
+    for ticker, info in config["allocations"].items():
+        last_price = round(live_prices.get(ticker, 0), 2)
+        news_html = news.get(ticker) or "No news available"
+        holdings.append({
+            "ticker": ticker,
+            "name": names.get(ticker, f"{ticker}"),
+            "weight": f"{info['weight']}%",
+            "quantity": info["quantity"],
+            "initial_price": info["initial_price"],
+            "last_price": last_price,
+            "news": news_html
+        })
+
+    # The session's 16:00 New York close, in UTC
+    session = date.fromisoformat(config["session"])
+    closed_at = datetime.combine(session, SESSION_CLOSE, tzinfo=EXCHANGE_TZ).astimezone(UTC)
+    output = {
+        "portfolio_weights": {k: v["weight"] for k, v in config["allocations"].items()},
+        "metrics": metrics,
+        "holdings": holdings,
+        "last_updated": closed_at.isoformat(),
+        "data_date": config["session"],
+        "chart_path": chart,
+        "projection": projection
+    }
+
+    with open("docs/portfolio.json", "w") as f:
+        json.dump(output, f, indent=2)
+
+    print(f"Portfolio updated successfully with data for the {config['session']} session, benchmarks, ESG news, and robust error handling.")
+    return "docs/portfolio.json"
+
 
-with open("docs/portfolio.json", "w") as f:
-    json.dump(output, f, indent=2)
+# Live prices, names, news and the price history are fetched side by side;
+# the projection and outputs are reused from data/artifacts when unchanged
+pipeline = Pipeline([
+    Stage("config", stage_config, memoize=False),
+    Stage("fetch", stage_fetch, ["config"], memoize=False),
+    Stage("live_prices", stage_live_prices, ["config", "fetch"], memoize=False),
+    Stage("names", stage_names, ["config"], memoize=False),
+    Stage("news", stage_news, ["config"], memoize=False),
+    Stage("history", stage_history, ["fetch"], memoize=False),
+    Stage("growth", stage_growth, ["config", "history"]),
+    Stage("chart", stage_chart, ["growth"], outputs=["docs/charts/portfolio_vs_benchmarks.png"]),
+    Stage("metrics", stage_metrics, ["growth"]),
+    Stage("projection", stage_projection, ["config", "growth"]),
+    Stage("output", stage_output, ["config", "live_prices", "names", "news", "metrics", "chart", "projection"],
+          outputs=["docs/portfolio.json"]),
+], name="refresh")
 
-print(f"Portfolio updated successfully with yesterday's data ({yesterday.strftime('%Y-%m-%d')}), benchmarks, ESG news, and robust error handling.")
+if __name__ == "__main__":
+    pipeline.run()
+    print(pipeline.summary())
+    # Per-stage time, memory and network use (ESG_PROMETHEUS_DIR adds a textfile)
+    recorder.write_report("refresh")
 
 # Set NEWS_API_KEY environment variable before running:
 # Windows: set NEWS_API_KEY=your_api_key